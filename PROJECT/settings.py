@@ -47,12 +47,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'base.middleware.HTMLGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'base.middleware.SecurityHeadersMiddleware',
+    # AuditLogMiddleware sets request.ip_address, which SessionSecurityMiddleware reuses
+    'base.middleware.AuditLogMiddleware',
+    'base.middleware.SessionSecurityMiddleware',
+    'base.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'PROJECT.urls'
@@ -164,8 +170,47 @@ OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
 # Data Storage
 DATA_DIR = BASE_DIR / 'data'
 EXCEL_DATABASE_PATH = DATA_DIR / 'jd_database.xlsx'
+# Append-only JD history; the Excel database is exported from it on demand
+JD_HISTORY_CSV_PATH = DATA_DIR / 'jd_database.csv'
 SKILLS_MAP_PATH = DATA_DIR / 'skills_map.json'
 
+# Caches
+# Caches shared between requests live in the database: every worker and
+# serverless instance sees the same entries, and unlike the project
+# directory the database is writable in deployment. The tables are created
+# by `manage.py createcachetable` (also run by migration 0015).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # OpenAI skill extraction results, keyed by normalized JD text
+    'llm': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_llm',
+        'TIMEOUT': 60 * 60 * 24 * 30,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Google Sheet DataFrames from the last fetch, reused by candidate matching
+    'sheets': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_sheets',
+        'TIMEOUT': 60 * 5,
+    },
+    # Matched candidates shown by show_matches, keyed by the match_id in the
+    # session, and the matched-file cleanup gate shared by all instances
+    'matches': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_matches',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Per-user request counters of RateLimitMiddleware
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_ratelimit',
+        'TIMEOUT': 60,
+    },
+}
 
 # # HTTPS/SSL Settings (Enable in production)
 # SECURE_SSL_REDIRECT = False  # Set to True in production
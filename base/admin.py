@@ -1,15 +1,79 @@
 from django.contrib import admin
 from django.contrib.auth.models import User, Group
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
 from django.urls import reverse
-from django.db.models import Count, Q
+from functools import lru_cache
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 from .models import JobDescription, GoogleSheetDatabase, AuditLog
 import json
 
 
+# Static badge markup, built once instead of through format_html on every row
+ACTIVE_BADGE = mark_safe('<span style="color: green;">●</span> Active')
+INACTIVE_BADGE = mark_safe('<span style="color: red;">●</span> Inactive')
+SHARED_BADGE = mark_safe('<span style="color: blue;">🌐 Shared</span>')
+PRIVATE_BADGE = mark_safe('<span style="color: gray;">🔒 Private</span>')
+NEVER_BADGE = mark_safe('<span style="color: red;">Never</span>')
+ONLINE_BADGE = mark_safe('<span style="color: green;">Online</span>')
+
+ACTION_COLORS = {
+    'JD_UPLOAD': 'blue',
+    'JD_VIEW': 'gray',
+    'JD_DELETE': 'red',
+    'SHEET_ADD': 'green',
+    'SHEET_SYNC': 'blue',
+    'SHEET_DELETE': 'red',
+    'MATCH_RUN': 'purple',
+    'FILE_DOWNLOAD': 'orange',
+    'LOGIN': 'green',
+    'LOGOUT': 'gray',
+    'PERMISSION_DENIED': 'red'
+}
+ACTION_BADGE_TEMPLATE = (
+    '<span style="background: {}; color: white; padding: 3px 8px; border-radius: 3px; font-size: 11px;">{}</span>'
+)
+
+# Box around the search string and skill category previews on the JD change page
+PREFORMATTED_BLOCK_TEMPLATE = (
+    '<div style="font-family: monospace; background: #f5f5f5; padding: 10px; border-radius: 5px;">{}</div>'
+)
+
+ACTION_BADGES = {
+    action: format_html(ACTION_BADGE_TEMPLATE, ACTION_COLORS.get(action, 'black'), label)
+    for action, label in AuditLog.ACTION_CHOICES
+}
+
+
+@lru_cache(maxsize=None)
+def admin_url_template(name):
+    """Resolve an admin change URL once and return it as a str.format template"""
+    return reverse(name, args=['__ID__']).replace('__ID__', '{}')
+
+
+@lru_cache(maxsize=None)
+def changelist_url(name):
+    """Resolve an admin changelist URL once"""
+    return reverse(name)
+
+
+def is_changelist_request(request):
+    """True when the admin request is for a model's changelist page"""
+    match = getattr(request, 'resolver_match', None)
+    return bool(match and match.url_name and match.url_name.endswith('_changelist'))
+
+
+class Echo:
+    """File-like object that hands back written values, for streaming CSV rows"""
+    
+    def write(self, value):
+        return value
+
+
 class JobDescriptionAdmin(admin.ModelAdmin):
     list_display = [
         'title', 
@@ -71,9 +135,16 @@ class JobDescriptionAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     actions = ['activate_jds', 'deactivate_jds', 'export_to_csv']
     list_per_page = 25
+    list_select_related = ('created_by',)
     
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
+        qs = super().get_queryset(request).select_related('created_by')
+        if is_changelist_request(request):
+            # Skip the large text columns the list never renders
+            qs = qs.only(
+                'title', 'role_category', 'experience_level', 'skills_count',
+                'is_active', 'created_at', 'created_by__username'
+            )
         if request.user.is_superuser:
             return qs
         return qs.filter(created_by=request.user)
@@ -84,19 +155,17 @@ class JobDescriptionAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     def created_by_link(self, obj):
-        url = reverse('admin:auth_user_change', args=[obj.created_by.id])
+        url = admin_url_template('admin:auth_user_change').format(obj.created_by_id)
         return format_html('<a href="{}">{}</a>', url, obj.created_by.username)
     created_by_link.short_description = 'Created By'
     
     def skills_count(self, obj):
-        skills = obj.get_all_skills_list()
-        return f"{len(skills)} skills"
+        return f"{obj.skills_count} skills"
     skills_count.short_description = 'Skills Count'
+    skills_count.admin_order_field = 'skills_count'
     
     def is_active_badge(self, obj):
-        if obj.is_active:
-            return format_html('<span style="color: green;">●</span> Active')
-        return format_html('<span style="color: red;">●</span> Inactive')
+        return ACTIVE_BADGE if obj.is_active else INACTIVE_BADGE
     is_active_badge.short_description = 'Status'
     
     def jd_text_preview(self, obj):
@@ -108,27 +177,25 @@ class JobDescriptionAdmin(admin.ModelAdmin):
     
     def linkedin_search_preview(self, obj):
         if obj.linkedin_search_string:
-            try:
-                searches = json.loads(obj.linkedin_search_string)
-                html = '<div style="font-family: monospace; background: #f5f5f5; padding: 10px; border-radius: 5px;">'
-                for key, value in searches.items():
-                    html += f'<strong>{key}:</strong><br>{value}<br><br>'
-                html += '</div>'
-                return format_html(html)
-            except:
-                return obj.linkedin_search_string
+            searches = obj.linkedin_search_string
+            if not isinstance(searches, dict):
+                return str(searches)
+            return format_html(
+                PREFORMATTED_BLOCK_TEMPLATE,
+                format_html_join('', '<strong>{}:</strong><br>{}<br><br>', searches.items())
+            )
         return 'No search strings available'
     linkedin_search_preview.short_description = 'LinkedIn Search Strings'
     
     def skill_categories_formatted(self, obj):
         if obj.skill_categories and isinstance(obj.skill_categories, dict):
-            html = '<div style="font-family: monospace; background: #f5f5f5; padding: 10px; border-radius: 5px;">'
-            for category, skills in obj.skill_categories.items():
-                if isinstance(skills, list):
-                    html += f'<strong>{category}:</strong><br>'
-                    html += ', '.join(skills) + '<br><br>'
-            html += '</div>'
-            return format_html(html)
+            return format_html(
+                PREFORMATTED_BLOCK_TEMPLATE,
+                format_html_join('', '<strong>{}:</strong><br>{}<br><br>', (
+                    (category, ', '.join(map(str, skills)))
+                    for category, skills in obj.skill_categories.items() if isinstance(skills, list)
+                ))
+            )
         return 'No categories available'
     skill_categories_formatted.short_description = 'Skill Categories'
     
@@ -144,25 +211,33 @@ class JobDescriptionAdmin(admin.ModelAdmin):
     
     def export_to_csv(self, request, queryset):
         import csv
-        from django.http import HttpResponse
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="job_descriptions.csv"'
+        from django.http import StreamingHttpResponse
         
-        writer = csv.writer(response)
-        writer.writerow(['Title', 'Role Category', 'Experience Level', 'Skills', 'Created By', 'Created At'])
+        writer = csv.writer(Echo())
         
-        for jd in queryset:
-            writer.writerow([
-                jd.title,
-                jd.role_category,
-                jd.experience_level,
-                jd.all_skills,
-                jd.created_by.username,
-                jd.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
+        def rows():
+            yield writer.writerow(['Title', 'Role Category', 'Experience Level', 'Skills', 'Created By', 'Created At'])
+            
+            # Plain tuples: no model instances are built for exported rows
+            rows_qs = queryset.values_list(
+                'title', 'role_category', 'experience_level', 'all_skills',
+                'created_by__username', 'created_at'
+            )
+            for title, role_category, experience_level, all_skills, username, created_at in rows_qs.iterator(chunk_size=1000):
+                yield writer.writerow([
+                    title,
+                    role_category,
+                    experience_level,
+                    all_skills,
+                    username,
+                    created_at.strftime('%Y-%m-%d %H:%M:%S')
+                ])
         
-        return response
+        return StreamingHttpResponse(
+            rows(),
+            content_type='text/csv',
+            headers={'Content-Disposition': 'attachment; filename="job_descriptions.csv"'}
+        )
     export_to_csv.short_description = 'Export to CSV'
 
 
@@ -218,9 +293,14 @@ class GoogleSheetDatabaseAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     actions = ['sync_sheets', 'share_sheets', 'unshare_sheets']
     list_per_page = 25
+    list_select_related = ('created_by',)
+    # Concurrent Google Sheet fetches in the sync action
+    SYNC_MAX_WORKERS = 8
     
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
+        # Join created_by for every admin view, not just the changelist:
+        # __str__ reads created_by.username on delete confirmations and history
+        qs = super().get_queryset(request).select_related('created_by')
         if request.user.is_superuser:
             return qs
         return qs.filter(Q(created_by=request.user) | Q(is_shared=True))
@@ -231,7 +311,7 @@ class GoogleSheetDatabaseAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     def created_by_link(self, obj):
-        url = reverse('admin:auth_user_change', args=[obj.created_by.id])
+        url = admin_url_template('admin:auth_user_change').format(obj.created_by_id)
         return format_html('<a href="{}">{}</a>', url, obj.created_by.username)
     created_by_link.short_description = 'Created By'
     
@@ -252,36 +332,48 @@ class GoogleSheetDatabaseAdmin(admin.ModelAdmin):
             
             color = 'green' if diff < timedelta(hours=24) else 'orange'
             return format_html('<span style="color: {};">{}</span>', color, time_str)
-        return format_html('<span style="color: red;">Never</span>')
+        return NEVER_BADGE
     last_synced_display.short_description = 'Last Synced'
     
     def is_shared_badge(self, obj):
-        if obj.is_shared:
-            return format_html('<span style="color: blue;">🌐 Shared</span>')
-        return format_html('<span style="color: gray;">🔒 Private</span>')
+        return SHARED_BADGE if obj.is_shared else PRIVATE_BADGE
     is_shared_badge.short_description = 'Sharing'
     
     def is_active_badge(self, obj):
-        if obj.is_active:
-            return format_html('<span style="color: green;">●</span> Active')
-        return format_html('<span style="color: red;">●</span> Inactive')
+        return ACTIVE_BADGE if obj.is_active else INACTIVE_BADGE
     is_active_badge.short_description = 'Status'
     
     def sync_sheets(self, request, queryset):
-        from .utils import fetch_google_sheet_data
+        from concurrent.futures import ThreadPoolExecutor
+        from .utils import count_google_sheet_candidates
+        
+        def fetch(sheet):
+            try:
+                return sheet, count_google_sheet_candidates(sheet.sheet_id)
+            except Exception:
+                return sheet, None
         
-        success_count = 0
+        # Sheet fetches are network-bound, so run them concurrently
+        sheets = list(queryset)
+        with ThreadPoolExecutor(max_workers=self.SYNC_MAX_WORKERS) as executor:
+            results = list(executor.map(fetch, sheets))
+        
+        synced = []
         error_count = 0
+        now = timezone.now()
         
-        for sheet in queryset:
-            try:
-                df = fetch_google_sheet_data(sheet.sheet_id)
-                sheet.total_candidates = len(df)
-                sheet.last_synced = timezone.now()
-                sheet.save()
-                success_count += 1
-            except Exception as e:
+        for sheet, total_candidates in results:
+            if total_candidates is None:
                 error_count += 1
+                continue
+            sheet.total_candidates = total_candidates
+            sheet.last_synced = now
+            sheet.updated_at = now
+            synced.append(sheet)
+        
+        if synced:
+            GoogleSheetDatabase.objects.bulk_update(synced, ['total_candidates', 'last_synced', 'updated_at'])
+        success_count = len(synced)
         
         if success_count:
             self.message_user(request, f'{success_count} sheets synced successfully.')
@@ -354,6 +446,16 @@ class AuditLogAdmin(admin.ModelAdmin):
     
     date_hierarchy = 'timestamp'
     list_per_page = 50
+    list_select_related = ('user',)
+    # Skip the unfiltered COUNT(*) over the whole audit table on filtered pages
+    show_full_result_count = False
+    
+    def get_queryset(self, request):
+        # __str__ reads the user on every admin view, not just the changelist
+        qs = super().get_queryset(request).select_related('user')
+        if is_changelist_request(request):
+            qs = qs.defer('user_agent')
+        return qs
     
     def has_add_permission(self, request):
         return False
@@ -365,32 +467,17 @@ class AuditLogAdmin(admin.ModelAdmin):
         return request.user.is_superuser
     
     def user_link(self, obj):
-        if obj.user:
-            url = reverse('admin:auth_user_change', args=[obj.user.id])
+        if obj.user_id is not None:
+            url = admin_url_template('admin:auth_user_change').format(obj.user_id)
             return format_html('<a href="{}">{}</a>', url, obj.user.username)
         return 'Anonymous'
     user_link.short_description = 'User'
     
     def action_badge(self, obj):
-        colors = {
-            'JD_UPLOAD': 'blue',
-            'JD_VIEW': 'gray',
-            'JD_DELETE': 'red',
-            'SHEET_ADD': 'green',
-            'SHEET_SYNC': 'blue',
-            'SHEET_DELETE': 'red',
-            'MATCH_RUN': 'purple',
-            'FILE_DOWNLOAD': 'orange',
-            'LOGIN': 'green',
-            'LOGOUT': 'gray',
-            'PERMISSION_DENIED': 'red'
-        }
-        color = colors.get(obj.action, 'black')
-        return format_html(
-            '<span style="background: {}; color: white; padding: 3px 8px; border-radius: 3px; font-size: 11px;">{}</span>',
-            color,
-            obj.get_action_display()
-        )
+        badge = ACTION_BADGES.get(obj.action)
+        if badge is None:
+            badge = format_html(ACTION_BADGE_TEMPLATE, 'black', obj.get_action_display())
+        return badge
     action_badge.short_description = 'Action'
     
     def target_info(self, obj):
@@ -400,11 +487,10 @@ class AuditLogAdmin(admin.ModelAdmin):
     target_info.short_description = 'Target'
     
     def view_details(self, obj):
+        # Link to the detail page (details_formatted) instead of inlining the JSON
         if obj.details:
-            return format_html(
-                '<a href="#" onclick="alert(\'{}\')" style="color: blue;">View</a>',
-                json.dumps(obj.details, indent=2).replace("'", "\\'")
-            )
+            url = admin_url_template('admin:base_auditlog_change').format(obj.id)
+            return format_html('<a href="{}" style="color: blue;">View</a>', url)
         return '-'
     view_details.short_description = 'Details'
     
@@ -424,16 +510,23 @@ class CustomUserAdmin(BaseUserAdmin):
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
+        # Independent correlated subqueries avoid the users x JDs x sheets join
+        jd_counts = JobDescription.objects.filter(created_by=OuterRef('pk')).order_by().values(
+            'created_by'
+        ).annotate(c=Count('*')).values('c')
+        sheet_counts = GoogleSheetDatabase.objects.filter(created_by=OuterRef('pk')).order_by().values(
+            'created_by'
+        ).annotate(c=Count('*')).values('c')
         qs = qs.annotate(
-            _jd_count=Count('job_descriptions', distinct=True),
-            _sheet_count=Count('google_sheets', distinct=True)
+            _jd_count=Coalesce(Subquery(jd_counts), 0),
+            _sheet_count=Coalesce(Subquery(sheet_counts), 0)
         )
         return qs
     
     def jd_count(self, obj):
         count = obj._jd_count
         if count > 0:
-            url = f'/admin/base/jobdescription/?created_by__id__exact={obj.id}'
+            url = f"{changelist_url('admin:base_jobdescription_changelist')}?created_by__id__exact={obj.id}"
             return format_html('<a href="{}">{} JDs</a>', url, count)
         return '0 JDs'
     jd_count.short_description = 'Job Descriptions'
@@ -442,7 +535,7 @@ class CustomUserAdmin(BaseUserAdmin):
     def sheet_count(self, obj):
         count = obj._sheet_count
         if count > 0:
-            url = f'/admin/base/googlesheetdatabase/?created_by__id__exact={obj.id}'
+            url = f"{changelist_url('admin:base_googlesheetdatabase_changelist')}?created_by__id__exact={obj.id}"
             return format_html('<a href="{}">{} Sheets</a>', url, count)
         return '0 Sheets'
     sheet_count.short_description = 'Google Sheets'
@@ -454,14 +547,14 @@ class CustomUserAdmin(BaseUserAdmin):
             diff = now - obj.last_login
             
             if diff < timedelta(hours=1):
-                return format_html('<span style="color: green;">Online</span>')
+                return ONLINE_BADGE
             elif diff < timedelta(days=1):
                 hours = int(diff.total_seconds() / 3600)
                 return format_html('<span style="color: orange;">{} hrs ago</span>', hours)
             else:
                 days = diff.days
                 return format_html('<span style="color: gray;">{} days ago</span>', days)
-        return format_html('<span style="color: red;">Never</span>')
+        return NEVER_BADGE
     last_login_formatted.short_description = 'Last Login'
 
 
@@ -0,0 +1,123 @@
+"""
+Analysis of uploaded JDs. upload_jd runs analyze_jd inline, with the row
+PENDING meanwhile; fail_stale_analyses cleans up after requests that were
+cut off before finishing.
+"""
+from django.utils import timezone
+from .models import JobDescription
+from .utils import (extract_text_from_file, extract_skills_from_jd, save_jd_to_excel,
+                    generate_linkedin_search_strings, get_default_error_response)
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A JD still PENDING this long after its last update lost the request that was
+# analyzing it (e.g. the serverless function hit its time limit)
+JD_ANALYSIS_TIMEOUT = timedelta(minutes=10)
+
+
+# Columns written by a finished analysis; save() adds the file and parsed list fields
+ANALYSIS_FIELDS = [
+    'jd_text', 'all_skills', 'linkedin_skills_string', 'linkedin_search_string', 'skill_categories',
+    'role_category', 'experience_level', 'key_responsibilities', 'qualifications', 'analysis_status',
+    'updated_at',
+]
+
+
+def analyze_jd(jd_pk, domain, username):
+    """
+    Extract text and skills for an uploaded JD and store the results.
+    Returns True if the analysis finished (DONE), False if it FAILED.
+    """
+    try:
+        jd = JobDescription.objects.get(pk=jd_pk)
+    except JobDescription.DoesNotExist:
+        return False
+
+    try:
+        # Extract text from uploaded file
+        jd_text = extract_text_from_file(jd.file.path)
+
+        if not jd_text:
+            logger.error(f"Text extraction failed for JD {jd.id}")
+            mark_analysis_failed(jd)
+            return False
+
+        # Store extracted text in database
+        jd.jd_text = jd_text
+
+        # Extract comprehensive skills using OpenAI
+        result = extract_skills_from_jd(jd_text, domain)
+        if result == get_default_error_response():
+            logger.error(f"Skill extraction failed for JD {jd.id}")
+            mark_analysis_failed(jd)
+            return False
+
+        # Get LinkedIn optimized skills
+        linkedin_skills = result.get('linkedin_optimized_skills', result.get('all_skills', [])[:10])
+
+        # Generate LinkedIn search strings
+        search_strings = generate_linkedin_search_strings(
+            linkedin_skills,
+            jd.title,
+            result.get('experience_level', 'Mid Level')
+        )
+
+        # Update model with comprehensive data
+        jd.all_skills = ", ".join(result.get('all_skills', []))
+        jd.linkedin_skills_string = ", ".join(linkedin_skills)
+        jd.linkedin_search_string = search_strings
+        jd.skill_categories = result.get('skill_categories', {})
+        jd.role_category = result.get('role_category', 'Unknown')
+        jd.experience_level = result.get('experience_level', 'Unknown')
+        jd.key_responsibilities = " | ".join(result.get('key_responsibilities', []))
+        jd.qualifications = " | ".join(result.get('qualifications', [])) if isinstance(result.get('qualifications'), list) else result.get('qualifications', '')
+        jd.analysis_status = 'DONE'
+        jd.save(update_fields=ANALYSIS_FIELDS)  # This will trigger file deletion via model's save() method
+        logger.info(f"JD {jd.id} successfully analyzed")
+
+    except Exception as e:
+        logger.error(f"Error processing JD {jd_pk}: {str(e)}")
+        mark_analysis_failed(jd)
+        return False
+
+    # The analysis is stored, so a failed history write doesn't fail it
+    try:
+        excel_data = {
+            'Job Title': jd.title,
+            'All Skills Required': jd.all_skills,
+            'LinkedIn Search Skills': jd.linkedin_skills_string,
+            'LinkedIn Boolean Search': search_strings.get('basic_and', ''),
+            'Role Category': jd.role_category,
+            'Experience Level': jd.experience_level,
+            'Key Responsibilities': jd.key_responsibilities,
+            'Qualifications': jd.qualifications,
+            'Date Uploaded': datetime.now().strftime('%Y-%m-%d'),
+            'Uploaded By': username
+        }
+        save_jd_to_excel(excel_data)
+    except Exception as e:
+        logger.error(f"Failed to save JD {jd.id} to history: {str(e)}")
+
+    return True
+
+
+def mark_analysis_failed(jd):
+    """Record a failed analysis and remove the uploaded file"""
+    try:
+        jd.file = None
+        jd.analysis_status = 'FAILED'
+        jd.save(update_fields=['file', 'analysis_status', 'updated_at'])
+    except Exception as e:
+        logger.error(f"Failed to mark JD {jd.pk} as failed: {str(e)}")
+
+
+def fail_stale_analyses(queryset=None):
+    """Mark JDs stuck in PENDING for longer than JD_ANALYSIS_TIMEOUT as FAILED; returns how many"""
+    queryset = JobDescription.objects.all() if queryset is None else queryset
+    stale = list(queryset.filter(analysis_status='PENDING', updated_at__lt=timezone.now() - JD_ANALYSIS_TIMEOUT))
+    for jd in stale:
+        logger.warning(f"JD {jd.pk} analysis timed out")
+        mark_analysis_failed(jd)
+    return len(stale)
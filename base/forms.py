@@ -1,6 +1,9 @@
 from django import forms
 from .models import JobDescription, GoogleSheetDatabase
 
+ALLOWED_FILE_EXTENSIONS = frozenset({'.pdf', '.docx', '.doc', '.txt'})
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+
 class JDUploadForm(forms.ModelForm):
     domain = forms.ChoiceField(
         choices=[
@@ -23,6 +26,27 @@ class JDUploadForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'e.g., Senior Marketing Manager'}),
             'file': forms.FileInput(attrs={'class': 'form-control', 'accept': '.txt,.pdf,.docx'}),
         }
+    
+    def clean_file(self):
+        """Validate uploaded file for security, before anything is saved"""
+        uploaded_file = self.cleaned_data.get('file')
+        if not uploaded_file:
+            raise forms.ValidationError("Please choose a job description file to upload.")
+        
+        # Check file extension
+        ext = '.' + uploaded_file.name.rpartition('.')[2].lower()
+        if ext not in ALLOWED_FILE_EXTENSIONS:
+            raise forms.ValidationError(
+                f"File type not allowed. Allowed types: {', '.join(sorted(ALLOWED_FILE_EXTENSIONS))}"
+            )
+        
+        # Check file size
+        if uploaded_file.size > MAX_FILE_SIZE:
+            raise forms.ValidationError(
+                f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / (1024*1024)}MB"
+            )
+        
+        return uploaded_file
 
 
 class GoogleSheetForm(forms.ModelForm):
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from base.utils import cleanup_old_matched_files
+
+
+class Command(BaseCommand):
+    help = "Delete exported matched-candidate files older than the given number of days"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=1, help="Age in days after which files are deleted (default 1)")
+    
+    def handle(self, *args, **options):
+        cleanup_old_matched_files(days=options['days'])
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from base.utils import export_jd_history_xlsx
+
+
+class Command(BaseCommand):
+    help = "Rebuild the JD history Excel workbook from the append-only CSV history"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Workbook path (default EXCEL_DATABASE_PATH)")
+    
+    def handle(self, *args, **options):
+        output_path = export_jd_history_xlsx(options['output'])
+        if output_path is None:
+            self.stdout.write("No JD history to export yet")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"JD history written to {output_path}"))
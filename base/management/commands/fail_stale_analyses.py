@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from base.analysis import fail_stale_analyses
+
+
+class Command(BaseCommand):
+    help = "Mark JDs whose analysis has been PENDING longer than JD_ANALYSIS_TIMEOUT as FAILED"
+    
+    def handle(self, *args, **options):
+        failed = fail_stale_analyses()
+        self.stdout.write(self.style.SUCCESS(f"{failed} stale analyses marked as failed"))
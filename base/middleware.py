@@ -1,18 +1,51 @@
 from django.utils.deprecation import MiddlewareMixin
+from django.middleware.gzip import GZipMiddleware
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.core.cache import caches
 from .models import AuditLog
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def log_audit_event(user, action, target=None, ip_address=None, user_agent='', details=None):
+    """
+    Create an audit log entry. Entries are security records, so they are
+    written on the caller's thread rather than buffered where a recycled
+    or frozen worker could lose them.
+    """
+    try:
+        AuditLog.objects.create(
+            user=user,
+            action=action,
+            target_model=target._meta.model_name if target is not None else '',
+            target_id=target.pk if target is not None else None,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            details=details or {},
+        )
+    except Exception as e:
+        logger.error(f"Failed to create audit log: {str(e)}")
+
+
+def get_client_ip(request):
+    """Get real client IP address"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
+
 class AuditLogMiddleware(MiddlewareMixin):
     """Log important user actions for security auditing"""
     
     def process_request(self, request):
         # Store IP address and user agent for logging
-        request.ip_address = self.get_client_ip(request)
+        request.ip_address = get_client_ip(request)
         request.user_agent = request.META.get('HTTP_USER_AGENT', '')
     
     def process_response(self, request, response):
@@ -34,112 +67,113 @@ class AuditLogMiddleware(MiddlewareMixin):
         
         return None
     
-    @staticmethod
-    def get_client_ip(request):
-        """Get real client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
-    
     @staticmethod
     def log_action(request, action, details=None):
         """Create audit log entry"""
-        try:
-            AuditLog.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                action=action,
-                ip_address=request.ip_address,
-                user_agent=request.user_agent,
-                details=details or {}
-            )
-        except Exception as e:
-            logger.error(f"Failed to create audit log: {str(e)}")
+        log_audit_event(
+            request.user if request.user.is_authenticated else None,
+            action,
+            ip_address=request.ip_address,
+            user_agent=request.user_agent,
+            details=details
+        )
 
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """Add additional security headers"""
     
+    # Header values are constant, so build them once at import time
+    CONTENT_SECURITY_POLICY = (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
+        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://fonts.googleapis.com; "
+        "font-src 'self' https://fonts.gstatic.com; "
+        "img-src 'self' data: https:; "
+        "connect-src 'self'; "
+    )
+    REFERRER_POLICY = 'strict-origin-when-cross-origin'
+    PERMISSIONS_POLICY = (
+        "geolocation=(), "
+        "microphone=(), "
+        "camera=(), "
+        "payment=(), "
+        "usb=(), "
+        "magnetometer=(), "
+        "gyroscope=(), "
+        "accelerometer=()"
+    )
+    
     def process_response(self, request, response):
-        # Content Security Policy
-        response['Content-Security-Policy'] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://cdnjs.cloudflare.com; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-            "font-src 'self' https://fonts.gstatic.com; "
-            "img-src 'self' data: https:; "
-            "connect-src 'self'; "
-        )
-        
-        # Referrer Policy
-        response['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        
-        # Permissions Policy
-        response['Permissions-Policy'] = (
-            "geolocation=(), "
-            "microphone=(), "
-            "camera=(), "
-            "payment=(), "
-            "usb=(), "
-            "magnetometer=(), "
-            "gyroscope=(), "
-            "accelerometer=()"
-        )
-        
+        response['Content-Security-Policy'] = self.CONTENT_SECURITY_POLICY
+        response['Referrer-Policy'] = self.REFERRER_POLICY
+        response['Permissions-Policy'] = self.PERMISSIONS_POLICY
         return response
 
 
+class HTMLGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware for rendered HTML pages only. File downloads and streamed
+    exports pass through untouched: xlsx files are already zip-compressed,
+    and compressing a stream drops its Content-Length.
+    """
+    
+    def process_response(self, request, response):
+        if response.streaming or not response.get('Content-Type', '').startswith('text/html'):
+            return response
+        return super().process_response(request, response)
+
+
 class RateLimitMiddleware(MiddlewareMixin):
     """Simple rate limiting for sensitive operations"""
     
-    def __init__(self, get_response):
-        self.get_response = get_response
-        self.rate_limit_cache = {}
+    # Max 30 POST requests per user per minute
+    RATE_LIMIT = 30
+    RATE_WINDOW = 60
+    
+    # Cache alias holding the counters; it must be shared by every worker
+    # and instance, or each one enforces its own limit
+    RATE_LIMIT_CACHE = 'ratelimit'
     
     def __call__(self, request):
         # Check rate limit for POST requests
         if request.method == 'POST' and request.user.is_authenticated:
             user_id = request.user.id
-            current_time = int(time.time())
-            
-            # Create user key
-            user_key = f"user_{user_id}"
-            
-            if user_key not in self.rate_limit_cache:
-                self.rate_limit_cache[user_key] = []
+            window = int(time.time()) // self.RATE_WINDOW
             
-            # Clean old entries (older than 1 minute)
-            self.rate_limit_cache[user_key] = [
-                timestamp for timestamp in self.rate_limit_cache[user_key]
-                if current_time - timestamp < 60
-            ]
+            # Fixed-window counter in the shared rate limit cache. The
+            # database cache's incr() isn't atomic, so concurrent requests
+            # can undercount slightly.
+            cache = caches[self.RATE_LIMIT_CACHE]
+            cache_key = f"rl:{user_id}:{window}"
+            cache.add(cache_key, 0, self.RATE_WINDOW)
+            try:
+                count = cache.incr(cache_key)
+            except ValueError:
+                # Key expired between add() and incr()
+                cache.set(cache_key, 1, self.RATE_WINDOW)
+                count = 1
             
-            # Check if rate limit exceeded (max 30 requests per minute)
-            if len(self.rate_limit_cache[user_key]) >= 30:
+            if count > self.RATE_LIMIT:
                 logger.warning(f"Rate limit exceeded for user {user_id}")
                 messages.error(request, "Too many requests. Please slow down.")
                 return redirect(request.META.get('HTTP_REFERER', '/'))
-            
-            # Add current request
-            self.rate_limit_cache[user_key].append(current_time)
         
         response = self.get_response(request)
         return response
 
 
-import time
-
-
 class SessionSecurityMiddleware(MiddlewareMixin):
     """Enhanced session security"""
     
+    # Seconds between last_activity refreshes
+    ACTIVITY_UPDATE_INTERVAL = 60
+    
     def process_request(self, request):
         if request.user.is_authenticated:
             # Check if IP address changed (potential session hijacking)
             session_ip = request.session.get('user_ip')
-            current_ip = self.get_client_ip(request)
+            # Reuse the address AuditLogMiddleware already parsed for this request
+            current_ip = getattr(request, 'ip_address', None) or get_client_ip(request)
             
             if session_ip and session_ip != current_ip:
                 logger.warning(
@@ -151,18 +185,12 @@ class SessionSecurityMiddleware(MiddlewareMixin):
                 # messages.warning(request, "Your session has been terminated for security reasons.")
                 # return redirect('login')
             
-            # Store current IP
-            request.session['user_ip'] = current_ip
+            # Only touch the session when something changed, so unchanged
+            # requests don't force a session-store write
+            if session_ip != current_ip:
+                request.session['user_ip'] = current_ip
             
-            # Update last activity
-            request.session['last_activity'] = int(time.time())
-    
-    @staticmethod
-    def get_client_ip(request):
-        """Get real client IP address"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+            # Update last activity at most once per interval
+            now = int(time.time())
+            if now - request.session.get('last_activity', 0) >= self.ACTIVITY_UPDATE_INTERVAL:
+                request.session['last_activity'] = now
\ No newline at end of file
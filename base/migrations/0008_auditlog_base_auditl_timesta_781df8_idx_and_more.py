@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_auditlog_alter_googlesheetdatabase_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp'], name='base_auditl_timesta_781df8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='googlesheetdatabase',
+            index=models.Index(fields=['created_by', 'is_active'], name='base_google_created_f6effa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdescription',
+            index=models.Index(fields=['-created_at'], name='base_jobdes_created_2ff248_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdescription',
+            index=models.Index(fields=['role_category', 'experience_level'], name='base_jobdes_role_ca_e0b535_idx'),
+        ),
+    ]
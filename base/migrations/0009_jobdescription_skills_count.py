@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:11
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_skills_count(apps, schema_editor):
+    JobDescription = apps.get_model('base', 'JobDescription')
+    # Same tokenizer as COMMA_TOKEN in base.models, so the backfilled
+    # counts match what JobDescription.save() stores
+    skill_token = re.compile(r'[^,\s](?:[^,]*[^,\s])?')
+    
+    updated = []
+    for jd in JobDescription.objects.only('id', 'all_skills').iterator(chunk_size=500):
+        jd.skills_count = len(skill_token.findall(jd.all_skills)) if jd.all_skills else 0
+        updated.append(jd)
+    
+    JobDescription.objects.bulk_update(updated, ['skills_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_auditlog_base_auditl_timesta_781df8_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='skills_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_skills_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:15
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_parsed_lists(apps, schema_editor):
+    JobDescription = apps.get_model('base', 'JobDescription')
+    # Same tokenizers as COMMA_TOKEN / PIPE_TOKEN in base.models, so the
+    # backfilled lists match what JobDescription.save() stores
+    comma = re.compile(r'[^,\s](?:[^,]*[^,\s])?')
+    pipe = re.compile(r'[^|\s](?:[^|]*[^|\s])?')
+    
+    def split(value, token):
+        return token.findall(value) if value else []
+    
+    fields = ['all_skills_json', 'linkedin_skills_json', 'responsibilities_json', 'qualifications_json']
+    updated = []
+    for jd in JobDescription.objects.only(
+        'id', 'all_skills', 'linkedin_skills_string', 'key_responsibilities', 'qualifications'
+    ).iterator(chunk_size=500):
+        jd.all_skills_json = split(jd.all_skills, comma)
+        jd.linkedin_skills_json = split(jd.linkedin_skills_string, comma)
+        jd.responsibilities_json = split(jd.key_responsibilities, pipe)
+        jd.qualifications_json = split(jd.qualifications, pipe)
+        updated.append(jd)
+    
+    JobDescription.objects.bulk_update(updated, fields, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_jobdescription_skills_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='all_skills_json',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobdescription',
+            name='linkedin_skills_json',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobdescription',
+            name='qualifications_json',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobdescription',
+            name='responsibilities_json',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_parsed_lists, migrations.RunPython.noop),
+    ]
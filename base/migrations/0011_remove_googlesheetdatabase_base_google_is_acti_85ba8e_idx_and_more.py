@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_jobdescription_parsed_list_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='googlesheetdatabase',
+            name='base_google_is_acti_85ba8e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobdescription',
+            name='base_jobdes_is_acti_4173b6_idx',
+        ),
+        migrations.AddIndex(
+            model_name='googlesheetdatabase',
+            index=models.Index(fields=['is_active', 'is_shared', 'created_by', '-created_at'], name='base_google_is_acti_045c86_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobdescription',
+            index=models.Index(fields=['is_active', 'created_by', '-created_at'], name='base_jobdes_is_acti_206634_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_remove_googlesheetdatabase_base_google_is_acti_85ba8e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='analysis_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='DONE', max_length=20),
+        ),
+    ]
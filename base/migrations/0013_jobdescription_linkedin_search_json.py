@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-15 10:05
+
+import json
+
+from django.db import migrations, models
+
+
+def parse_search_strings(apps, schema_editor):
+    JobDescription = apps.get_model('base', 'JobDescription')
+    
+    updated = []
+    for jd in JobDescription.objects.only('id', 'linkedin_search_string').iterator(chunk_size=500):
+        try:
+            searches = json.loads(jd.linkedin_search_string) if jd.linkedin_search_string else {}
+        except json.JSONDecodeError:
+            searches = {}
+        jd.linkedin_search_json = searches if isinstance(searches, dict) else {}
+        updated.append(jd)
+    
+    JobDescription.objects.bulk_update(updated, ['linkedin_search_json'], batch_size=500)
+
+
+def serialize_search_strings(apps, schema_editor):
+    JobDescription = apps.get_model('base', 'JobDescription')
+    
+    updated = []
+    for jd in JobDescription.objects.only('id', 'linkedin_search_json').iterator(chunk_size=500):
+        jd.linkedin_search_string = json.dumps(jd.linkedin_search_json) if jd.linkedin_search_json else ''
+        updated.append(jd)
+    
+    JobDescription.objects.bulk_update(updated, ['linkedin_search_string'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_jobdescription_analysis_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='linkedin_search_json',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(parse_search_strings, serialize_search_strings),
+        migrations.RemoveField(
+            model_name='jobdescription',
+            name='linkedin_search_string',
+        ),
+        migrations.RenameField(
+            model_name='jobdescription',
+            old_name='linkedin_search_json',
+            new_name='linkedin_search_string',
+        ),
+    ]
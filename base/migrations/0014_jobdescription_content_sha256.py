@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-15 09:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_jobdescription_linkedin_search_json'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobdescription',
+            name='content_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='jobdescription',
+            index=models.Index(fields=['created_by', 'content_sha256'], name='base_jobdes_created_450318_idx'),
+        ),
+    ]
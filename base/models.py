@@ -2,21 +2,59 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import URLValidator, MinValueValidator, MaxValueValidator
 import re
-import os
+from pathlib import Path
+
+# Tokenizers for the comma/pipe-delimited text fields on JobDescription.
+# Each match is one trimmed, non-empty item, so a single findall() scan
+# replaces split + strip + empty filtering.
+COMMA_TOKEN = re.compile(r'[^,\s](?:[^,]*[^,\s])?')
+PIPE_TOKEN = re.compile(r'[^|\s](?:[^|]*[^|\s])?')
+
+# Ways a Google Sheet ID can appear in GoogleSheetDatabase.sheet_url:
+# a /spreadsheets/d/<id> URL, a legacy key=<id> URL, or a bare ID
+SHEET_ID_PATTERN = re.compile(
+    r'/spreadsheets/d/(?P<path_id>[a-zA-Z0-9_-]+)'
+    r'|key=(?P<key_id>[a-zA-Z0-9_-]+)'
+    r'|^(?P<bare_id>[a-zA-Z0-9_-]+)$'
+)
+
+
+def split_delimited(value, token):
+    """Split a delimited string into stripped, non-empty items"""
+    return token.findall(value) if value else []
+
 
 class JobDescription(models.Model):
     title = models.CharField(max_length=200)
     file = models.FileField(upload_to='jds/', blank=True, null=True)
     jd_text = models.TextField(blank=True)
     all_skills = models.TextField(blank=True)
+    skills_count = models.PositiveIntegerField(default=0, editable=False)
     linkedin_skills_string = models.TextField(blank=True)
-    linkedin_search_string = models.TextField(blank=True)
+    linkedin_search_string = models.JSONField(default=dict, blank=True)
     skill_categories = models.JSONField(default=dict, blank=True)
     role_category = models.CharField(max_length=100, blank=True)
     experience_level = models.CharField(max_length=100, blank=True)
     key_responsibilities = models.TextField(blank=True)
     qualifications = models.TextField(blank=True)
     
+    # Parsed copies of the delimited text fields above, maintained by save()
+    all_skills_json = models.JSONField(default=list, blank=True, editable=False)
+    linkedin_skills_json = models.JSONField(default=list, blank=True, editable=False)
+    responsibilities_json = models.JSONField(default=list, blank=True, editable=False)
+    qualifications_json = models.JSONField(default=list, blank=True, editable=False)
+    
+    # PENDING while an upload is being analyzed (see analysis.analyze_jd)
+    ANALYSIS_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    analysis_status = models.CharField(max_length=20, choices=ANALYSIS_STATUS_CHOICES, default='DONE')
+    
+    # SHA-256 of the uploaded file and analysis domain, to spot re-uploads
+    content_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    
     # Security fields
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='job_descriptions')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -26,8 +64,11 @@ class JobDescription(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
+            models.Index(fields=['-created_at']),
             models.Index(fields=['created_by', '-created_at']),
-            models.Index(fields=['is_active']),
+            models.Index(fields=['is_active', 'created_by', '-created_at']),
+            models.Index(fields=['role_category', 'experience_level']),
+            models.Index(fields=['created_by', 'content_sha256']),
         ]
         permissions = [
             ("can_view_all_jds", "Can view all job descriptions"),
@@ -38,35 +79,78 @@ class JobDescription(models.Model):
         return f"{self.title} - {self.created_by.username}"
     
     def save(self, *args, **kwargs):
-        # Delete old file if it exists and a new file is being uploaded
+        update_fields = kwargs.get('update_fields')
+        
+        # Once the text has been extracted the uploaded file is no longer
+        # needed (for security). Clear the field in this same UPDATE rather
+        # than saving a second time.
+        if self.file and self.jd_text:
+            self.file = None
+            if update_fields is not None:
+                update_fields = {*update_fields, 'file'}
+        
+        # Find the stored file that this save replaces or clears,
+        # fetching only the file name rather than the whole row
+        replaced_file = None
         if self.pk:
-            try:
-                old_instance = JobDescription.objects.get(pk=self.pk)
-                if old_instance.file and old_instance.file != self.file:
-                    if os.path.exists(old_instance.file.path):
-                        os.remove(old_instance.file.path)
-            except JobDescription.DoesNotExist:
-                pass
+            old_file = JobDescription.objects.filter(pk=self.pk).values_list('file', flat=True).first()
+            if old_file and old_file != self.file.name:
+                replaced_file = self.file.storage.path(old_file)
+        
+        # Parse the delimited text fields once on write so reads get ready-made lists
+        for source, (target, token) in self.PARSED_LIST_FIELDS.items():
+            setattr(self, target, split_delimited(getattr(self, source), token))
+        self.skills_count = len(self.all_skills_json)
+        
+        if update_fields is not None:
+            derived = {self.PARSED_LIST_FIELDS[f][0] for f in update_fields if f in self.PARSED_LIST_FIELDS}
+            if 'all_skills' in update_fields:
+                derived.add('skills_count')
+            kwargs['update_fields'] = {*update_fields, *derived}
         
         super().save(*args, **kwargs)
         
-        # Delete file after saving (for security)
-        # if self.file and os.path.exists(self.file.path):
-        #     os.remove(self.file.path)
-        #     self.file = None
-        #     super().save(update_fields=['file'])
+        # Remove the old file only after the row no longer points at it
+        if replaced_file:
+            Path(replaced_file).unlink(missing_ok=True)
+    
+    # Delimited text field -> (parsed JSON list field, tokenizer)
+    PARSED_LIST_FIELDS = {
+        'all_skills': ('all_skills_json', COMMA_TOKEN),
+        'linkedin_skills_string': ('linkedin_skills_json', COMMA_TOKEN),
+        'key_responsibilities': ('responsibilities_json', PIPE_TOKEN),
+        'qualifications': ('qualifications_json', PIPE_TOKEN),
+    }
+    
+    # The lists are read straight from the JSON fields that save() (and
+    # migration 0010 for older rows) keeps in step with the text fields
+    @property
+    def all_skills_list(self):
+        return self.all_skills_json
+    
+    @property
+    def linkedin_skills_list(self):
+        return self.linkedin_skills_json
+    
+    @property
+    def responsibilities_list(self):
+        return self.responsibilities_json
+    
+    @property
+    def qualifications_list(self):
+        return self.qualifications_json
     
     def get_all_skills_list(self):
-        return [s.strip() for s in self.all_skills.split(',') if s.strip()]
+        return self.all_skills_list
     
     def get_linkedin_skills_list(self):
-        return [s.strip() for s in self.linkedin_skills_string.split(',') if s.strip()]
+        return self.linkedin_skills_list
     
     def get_responsibilities_list(self):
-        return [r.strip() for r in self.key_responsibilities.split('|') if r.strip()]
+        return self.responsibilities_list
     
     def get_qualifications_list(self):
-        return [q.strip() for q in self.qualifications.split('|') if q.strip()]
+        return self.qualifications_list
 
 
 class GoogleSheetDatabase(models.Model):
@@ -95,7 +179,8 @@ class GoogleSheetDatabase(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['created_by', '-created_at']),
-            models.Index(fields=['is_active', 'is_shared']),
+            models.Index(fields=['created_by', 'is_active']),
+            models.Index(fields=['is_active', 'is_shared', 'created_by', '-created_at']),
         ]
         permissions = [
             ("can_view_all_sheets", "Can view all Google Sheets"),
@@ -107,17 +192,10 @@ class GoogleSheetDatabase(models.Model):
     
     def extract_sheet_id(self):
         """Extract Google Sheet ID from URL"""
-        patterns = [
-            r'/spreadsheets/d/([a-zA-Z0-9-_]+)',
-            r'key=([a-zA-Z0-9-_]+)',
-            r'^([a-zA-Z0-9-_]+)$'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, self.sheet_url)
-            if match:
-                self.sheet_id = match.group(1)
-                return self.sheet_id
+        match = SHEET_ID_PATTERN.search(self.sheet_url)
+        if match:
+            self.sheet_id = match.group('path_id') or match.group('key_id') or match.group('bare_id')
+            return self.sheet_id
         
         return None
 
@@ -150,6 +228,7 @@ class AuditLog(models.Model):
     class Meta:
         ordering = ['-timestamp']
         indexes = [
+            models.Index(fields=['-timestamp']),
             models.Index(fields=['user', '-timestamp']),
             models.Index(fields=['action', '-timestamp']),
         ]
@@ -1,3 +1,382 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+
+from django.contrib.admin.sites import site
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import JobDescriptionAdmin
+from .middleware import HTMLGZipMiddleware, RateLimitMiddleware
+from .models import GoogleSheetDatabase, JobDescription
+from .analysis import JD_ANALYSIS_TIMEOUT
+from .utils import (JD_TRUNCATION_MARK, MAX_JD_PROMPT_CHARS, MAX_JD_PROMPT_TOKENS, SHEET_CANDIDATE_COLUMNS,
+                    SKILL_EXTRACTION_ERROR, get_default_error_response, match_candidates_in_dataframe,
+                    parse_skill_results, skill_cache_key, truncate_jd_text)
+
+SKILLS_RESULT = {
+    'all_skills': ['Python', 'Django', 'SQL'],
+    'linkedin_optimized_skills': ['Python', 'Django'],
+    'skill_categories': {'technical_skills': ['Python', 'Django', 'SQL']},
+    'role_category': 'Engineering',
+    'experience_level': 'Senior Level',
+    'key_responsibilities': ['Build web services'],
+    'qualifications': ['5+ years of Python'],
+}
+
+
+class RateLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        caches[RateLimitMiddleware.RATE_LIMIT_CACHE].clear()
+        self.user = User.objects.create_user('limited', password='pw')
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse('ok'))
+    
+    def post(self):
+        request = RequestFactory().post('/')
+        request.user = self.user
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return self.middleware(request)
+    
+    def test_requests_over_the_limit_are_redirected(self):
+        for _ in range(RateLimitMiddleware.RATE_LIMIT):
+            self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(self.post().status_code, 302)
+    
+    def test_get_requests_are_not_counted(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        for _ in range(RateLimitMiddleware.RATE_LIMIT + 1):
+            self.assertEqual(self.middleware(request).status_code, 200)
+
+
+@mock.patch('base.analysis.save_jd_to_excel')
+class JDAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('analyst', password='pw')
+        self.client.force_login(self.user)
+    
+    def upload(self, content=b'Senior Python developer with Django and SQL', title='Backend Engineer'):
+        jd_file = SimpleUploadedFile('jd.txt', content, content_type='text/plain')
+        return self.client.post(reverse('upload_jd'), {'title': title, 'file': jd_file, 'domain': 'Technical'})
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', return_value=SKILLS_RESULT)
+    def test_successful_analysis_is_done(self, extract_skills, save_jd_to_excel):
+        response = self.upload()
+        jd = JobDescription.objects.get()
+        self.assertRedirects(response, reverse('results', args=[jd.pk]))
+        self.assertEqual(jd.analysis_status, 'DONE')
+        self.assertEqual(jd.all_skills_json, ['Python', 'Django', 'SQL'])
+        self.assertFalse(jd.file)
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', side_effect=RuntimeError('OpenAI unavailable'))
+    def test_failed_analysis_is_failed(self, extract_skills, save_jd_to_excel):
+        self.assertRedirects(self.upload(), reverse('upload_jd'))
+        jd = JobDescription.objects.get()
+        self.assertEqual(jd.analysis_status, 'FAILED')
+        self.assertEqual(self.client.get(reverse('upload_jd')).context['recent_jds'], [])
+        self.assertFalse(jd.file)
+        self.assertContains(self.client.get(reverse('results', args=[jd.pk])), 'Analysis Failed')
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', side_effect=lambda *args: get_default_error_response())
+    def test_error_response_is_failed(self, extract_skills, save_jd_to_excel):
+        self.upload()
+        self.assertEqual(JobDescription.objects.get().analysis_status, 'FAILED')
+        save_jd_to_excel.assert_not_called()
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', return_value=SKILLS_RESULT)
+    def test_failed_history_write_keeps_analysis_done(self, extract_skills, save_jd_to_excel):
+        save_jd_to_excel.side_effect = OSError('read-only file system')
+        self.upload()
+        self.assertEqual(JobDescription.objects.get().analysis_status, 'DONE')
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', return_value=SKILLS_RESULT)
+    def test_reupload_goes_to_successful_analysis(self, extract_skills, save_jd_to_excel):
+        self.upload()
+        jd = JobDescription.objects.get()
+        self.assertRedirects(self.upload(), reverse('results', args=[jd.pk]))
+        self.assertEqual(JobDescription.objects.count(), 1)
+        extract_skills.assert_called_once()
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', return_value=SKILLS_RESULT)
+    def test_reupload_under_a_new_title_is_analyzed(self, extract_skills, save_jd_to_excel):
+        self.upload()
+        self.upload(title='Platform Engineer')
+        self.assertEqual(sorted(JobDescription.objects.values_list('title', flat=True)), ['Backend Engineer', 'Platform Engineer'])
+    
+    @mock.patch('base.analysis.extract_skills_from_jd', return_value=SKILLS_RESULT)
+    def test_reupload_retries_unsuccessful_analyses(self, extract_skills, save_jd_to_excel):
+        self.upload()
+        failed = JobDescription.objects.get()
+        JobDescription.objects.filter(pk=failed.pk).update(analysis_status='FAILED')
+        self.upload()
+        error = JobDescription.objects.exclude(pk=failed.pk).get()
+        JobDescription.objects.filter(pk=error.pk).update(all_skills=SKILL_EXTRACTION_ERROR)
+        self.upload()
+        stale = JobDescription.objects.exclude(pk__in=[failed.pk, error.pk]).get()
+        JobDescription.objects.filter(pk=stale.pk).update(
+            analysis_status='PENDING', updated_at=timezone.now() - JD_ANALYSIS_TIMEOUT - timedelta(minutes=1)
+        )
+        self.upload()
+        self.assertEqual(JobDescription.objects.count(), 4)
+        self.assertEqual(extract_skills.call_count, 4)
+    
+    def test_stale_pending_analysis_is_failed(self, save_jd_to_excel):
+        jd = JobDescription.objects.create(title='Stuck', created_by=self.user, analysis_status='PENDING')
+        self.assertContains(self.client.get(reverse('results', args=[jd.pk])), 'Analyzing Job Description')
+        
+        JobDescription.objects.filter(pk=jd.pk).update(updated_at=timezone.now() - JD_ANALYSIS_TIMEOUT - timedelta(minutes=1))
+        self.assertContains(self.client.get(reverse('results', args=[jd.pk])), 'Analysis Failed')
+        jd.refresh_from_db()
+        self.assertEqual(jd.analysis_status, 'FAILED')
+    
+    def test_other_users_cannot_fail_a_pending_analysis(self, save_jd_to_excel):
+        jd = JobDescription.objects.create(title='Stuck', created_by=self.user, analysis_status='PENDING')
+        JobDescription.objects.filter(pk=jd.pk).update(updated_at=timezone.now() - JD_ANALYSIS_TIMEOUT - timedelta(minutes=1))
+        self.client.force_login(User.objects.create_user('intruder', password='pw'))
+        self.assertEqual(self.client.get(reverse('results', args=[jd.pk])).status_code, 404)
+        jd.refresh_from_db()
+        self.assertEqual(jd.analysis_status, 'PENDING')
+
+
+class JobDescriptionListFieldTests(TestCase):
+    def test_save_stores_parsed_lists(self):
+        user = User.objects.create_user('lists', password='pw')
+        jd = JobDescription.objects.create(
+            title='Backend', created_by=user,
+            all_skills=' Python ,, SQL , ', key_responsibilities='Build APIs | | Review code',
+        )
+        jd.refresh_from_db()
+        self.assertEqual(jd.all_skills_list, ['Python', 'SQL'])
+        self.assertEqual(jd.skills_count, 2)
+        self.assertEqual(jd.responsibilities_list, ['Build APIs', 'Review code'])
+        self.assertEqual(jd.qualifications_list, [])
+    
+    def test_lists_come_from_stored_json(self):
+        jd = JobDescription(all_skills='Python, SQL', all_skills_json=['Go'])
+        self.assertEqual(jd.all_skills_list, ['Go'])
+
+
+class SkillCacheKeyTests(TestCase):
+    def test_key_ignores_case_and_whitespace(self):
+        self.assertEqual(skill_cache_key("Python  and\nSQL"), skill_cache_key("python and sql"))
+    
+    def test_key_tells_symbol_skills_apart(self):
+        keys = {skill_cache_key(f"Experience with {skill} required") for skill in ("C", "C++", "C#")}
+        self.assertEqual(len(keys), 3)
+
+
+class ParseSkillResultsTests(TestCase):
+    def reply(self, *ids):
+        return json.dumps({'results': [{'id': jd_id, 'all_skills': [f'Skill {n}']} for n, jd_id in enumerate(ids)]})
+    
+    def skills(self, content, count=2):
+        return [result['all_skills'] for result in parse_skill_results(content, count)]
+    
+    def test_results_are_matched_by_id(self):
+        self.assertEqual(self.skills(self.reply(1, 0)), [['Skill 1'], ['Skill 0']])
+        self.assertEqual(self.skills(self.reply('1', '0')), [['Skill 1'], ['Skill 0']])
+    
+    def test_results_without_usable_ids_keep_their_order(self):
+        self.assertEqual(self.skills(self.reply(None, 'b')), [['Skill 0'], ['Skill 1']])
+    
+    def test_skipped_jd_gets_the_error_response(self):
+        self.assertEqual(self.skills(self.reply(0)), [['Skill 0'], [SKILL_EXTRACTION_ERROR]])
+    
+    def test_unparseable_reply_fails_every_jd(self):
+        truncated = self.reply(0, 1)[:-10]
+        for content in (truncated, '[]', json.dumps({'results': ['not an object']})):
+            self.assertEqual(self.skills(content), [[SKILL_EXTRACTION_ERROR]] * 2)
+    
+    def test_missing_keys_are_filled_in(self):
+        result, = parse_skill_results(json.dumps({'results': [{'id': 0, 'all_skills': ['Python']}]}), 1)
+        self.assertEqual(result['linkedin_optimized_skills'], ['Python'])
+        self.assertEqual(result['skill_categories'], {})
+        self.assertNotIn('id', result)
+
+
+class CharacterEncoding:
+    """Stand-in tokenizer with one token per character"""
+    
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+    
+    def decode(self, tokens):
+        return ''.join(tokens)
+
+
+class TruncateJDTextTests(TestCase):
+    def truncate(self, jd_text, encoding):
+        with mock.patch('base.utils.get_jd_encoding', return_value=encoding):
+            return truncate_jd_text(jd_text)
+    
+    def assertKeepsBothEnds(self, truncated, jd_text, budget):
+        head, tail = truncated.split(JD_TRUNCATION_MARK)
+        self.assertEqual(len(head) + len(tail), budget)
+        self.assertTrue(jd_text.startswith(head))
+        self.assertTrue(jd_text.endswith(tail))
+        self.assertEqual(len(tail), budget // 4)
+    
+    def test_short_text_is_unchanged(self):
+        jd_text = 'Python developer'
+        self.assertIs(self.truncate(jd_text, CharacterEncoding()), jd_text)
+        self.assertIs(self.truncate(jd_text, None), jd_text)
+    
+    def test_long_text_keeps_start_and_end_tokens(self):
+        jd_text = ''.join(chr(ord('a') + i % 26) for i in range(MAX_JD_PROMPT_TOKENS * 2))
+        self.assertKeepsBothEnds(self.truncate(jd_text, CharacterEncoding()), jd_text, MAX_JD_PROMPT_TOKENS)
+    
+    def test_very_long_text_only_encodes_its_ends(self):
+        jd_text = 'start ' + 'x' * MAX_JD_PROMPT_TOKENS * 30 + ' end'
+        encoding = CharacterEncoding()
+        with mock.patch.object(encoding, 'encode', wraps=encoding.encode) as encode:
+            truncated = self.truncate(jd_text, encoding)
+        self.assertEqual(len(encode.call_args.args[0]), MAX_JD_PROMPT_TOKENS * 20)
+        self.assertKeepsBothEnds(truncated, jd_text, MAX_JD_PROMPT_TOKENS)
+    
+    def test_without_tokenizer_text_is_cut_by_characters(self):
+        jd_text = 'start ' + 'x' * MAX_JD_PROMPT_CHARS + ' end'
+        self.assertKeepsBothEnds(self.truncate(jd_text, None), jd_text, MAX_JD_PROMPT_CHARS)
+
+
+class ResultsRevalidationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reviewer', password='pw')
+        self.client.force_login(self.user)
+        self.jd = JobDescription.objects.create(
+            title='Data Engineer', created_by=self.user, all_skills='Python, SQL', analysis_status='DONE'
+        )
+        self.url = reverse('results', args=[self.jd.pk])
+        # The first render sets the CSRF cookie, which is part of the ETag
+        self.client.get(self.url)
+    
+    def test_unchanged_results_are_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+    
+    def test_updated_results_are_rendered_again(self):
+        etag = self.client.get(self.url)['ETag']
+        self.jd.all_skills = 'Python, SQL, Spark'
+        self.jd.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class CandidateMatchingTests(TestCase):
+    candidates = pd.DataFrame({
+        'Candidate Name': ['Ada', 'Brendan', 'Bjarne', 'Grace'],
+        'Skills': ['Java, SQL', 'JavaScript, Node.js', 'C++, Linux', 'core java'],
+    })
+    
+    def match(self, required_skills, min_match_percentage=100):
+        return match_candidates_in_dataframe(
+            self.candidates, required_skills, min_match_percentage, SHEET_CANDIDATE_COLUMNS
+        )
+    
+    def matched_names(self, required_skills):
+        return sorted(self.match(required_skills)['name'])
+    
+    def test_skills_match_on_whole_words(self):
+        self.assertEqual(self.matched_names(['Java']), ['Ada', 'Grace'])
+        self.assertEqual(self.matched_names(['JavaScript']), ['Brendan'])
+        self.assertEqual(self.matched_names(['C']), [])
+        self.assertEqual(self.matched_names(['C++']), ['Bjarne'])
+    
+    def test_scores_are_ranked_best_first(self):
+        matches = self.match(['Java', 'SQL', 'Core Java', 'Node.js'], 25)
+        self.assertEqual(
+            matches[['name', 'matched_skills', 'match_percentage', 'matched_skills_count']].to_dict('records'),
+            [
+                {'name': 'Ada', 'matched_skills': ['java', 'sql', 'core java'],
+                 'match_percentage': 75.0, 'matched_skills_count': 3},
+                {'name': 'Grace', 'matched_skills': ['java', 'core java'],
+                 'match_percentage': 50.0, 'matched_skills_count': 2},
+                {'name': 'Brendan', 'matched_skills': ['node.js'],
+                 'match_percentage': 25.0, 'matched_skills_count': 1},
+            ]
+        )
+        self.assertEqual(set(matches['total_required_skills']), {4})
+    
+    def test_candidates_below_threshold_are_dropped(self):
+        self.assertEqual(list(self.match(['Java', 'SQL', 'Linux'], 60)['name']), ['Ada'])
+        self.assertEqual(list(self.match(['Java', 'SQL', 'Linux'], 30)['name']), ['Ada', 'Bjarne', 'Grace'])
+    
+    def test_missing_sheet_columns_are_filled_in(self):
+        matches = self.match(['SQL'])
+        self.assertEqual(list(matches['email']), ['N/A'])
+        self.assertEqual(list(matches['skills']), ['Java, SQL'])
+
+
+class CandidateMatchingWithoutAhoCorasickTests(CandidateMatchingTests):
+    """The same cases on the regex fallback used when pyahocorasick is missing"""
+    
+    def setUp(self):
+        patcher = mock.patch('base.utils.ahocorasick', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class HTMLGZipMiddlewareTests(TestCase):
+    def process(self, response):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        return HTMLGZipMiddleware(lambda request: response)(request)
+    
+    def test_html_is_compressed(self):
+        response = self.process(HttpResponse('<p>match</p>' * 100, content_type='text/html; charset=utf-8'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+    
+    def test_downloads_and_streams_are_not_compressed(self):
+        xlsx = FileResponse(
+            iter([b'PK' * 200]), content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        csv = StreamingHttpResponse(iter(['name,email\n'] * 100), content_type='text/csv')
+        for response in (xlsx, csv):
+            self.assertFalse(self.process(response).has_header('Content-Encoding'))
+
+
+class MatchDownloadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('recruiter', password='pw')
+        self.client.force_login(self.user)
+        self.jd = JobDescription.objects.create(
+            title='Data Engineer', created_by=self.user, all_skills='Python, SQL', analysis_status='DONE'
+        )
+        self.sheet = GoogleSheetDatabase.objects.create(
+            name='Candidates', sheet_url='https://docs.google.com/spreadsheets/d/abc/edit', sheet_id='abc',
+            created_by=self.user
+        )
+    
+    @mock.patch('base.views.match_candidates_from_google_sheet')
+    def test_download_runs_the_match_again(self, match):
+        match.return_value = match_candidates_in_dataframe(
+            CandidateMatchingTests.candidates, ['Java', 'SQL'], 50, SHEET_CANDIDATE_COLUMNS
+        )
+        self.client.post(reverse('match_candidates', args=[self.jd.pk]), {
+            'google_sheet': self.sheet.pk, 'min_match_percentage': 50,
+        })
+        response = self.client.get(reverse('download_matched_file', args=[self.jd.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'PK'))
+        response.close()
+        self.assertEqual(match.call_args_list, [mock.call('abc', ['Python', 'SQL'], 50)] * 2)
+
+
+class JobDescriptionAdminTests(TestCase):
+    def test_previews_escape_stored_values(self):
+        admin = JobDescriptionAdmin(JobDescription, site)
+        jd = JobDescription(
+            linkedin_search_string={'basic_and': '<script>alert(1)</script> AND SQL'},
+            skill_categories={'Technical': ['C++', '<b>Go</b>']},
+        )
+        self.assertIn('&lt;script&gt;alert(1)&lt;/script&gt; AND SQL', admin.linkedin_search_preview(jd))
+        self.assertIn('C++, &lt;b&gt;Go&lt;/b&gt;', admin.skill_categories_formatted(jd))
@@ -1,49 +1,150 @@
+import csv
 import json
 import re
-from openai import OpenAI
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+import numpy as np
 import pandas as pd
+import xlsxwriter
 from pathlib import Path
 from django.conf import settings
+from django.core.cache import cache, caches
 from PyPDF2 import PdfReader
 from docx import Document
+from lxml import etree
+import hashlib
+import zipfile
 import os
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+try:
+    # PDFium (C++) extracts text far faster than the pure-Python PyPDF2 reader
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    # Token-exact truncation of JD text for the prompt
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    # Aho-Corasick finds every required skill in one pass over the candidate skills
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    # Calamine (Rust) parses .xlsx several times faster than openpyxl
+    import python_calamine  # noqa: F401
+    EXCEL_READ_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_READ_ENGINE = 'openpyxl'
 
 def generate_linkedin_search_strings(skills, role_title, experience_level):
     '''Generate optimized LinkedIn Recruiter boolean search strings'''
     
-    # Clean and prepare skills
-    top_skills = skills[:15] if len(skills) > 15 else skills
+    # Clean and prepare skills, quoting each one once for all the variations below
+    top_skills = skills[:15]
+    quoted = [f'"{skill}"' for skill in top_skills]
     
     # Create different search string variations
     searches = {}
     
     # 1. Basic Boolean Search (AND)
-    basic_and = " AND ".join([f'"{skill}"' for skill in top_skills[:8]])
-    searches['basic_and'] = basic_and
+    searches['basic_and'] = " AND ".join(quoted[:8])
     
     # 2. Flexible Boolean Search (OR for similar skills)
     if len(top_skills) >= 3:
-        part1 = " OR ".join([f'"{skill}"' for skill in top_skills[:3]])
-        part2 = " OR ".join([f'"{skill}"' for skill in top_skills[3:6]])
-        flexible = f'({part1}) AND ({part2})' if part2 else f'({part1})'
-        searches['flexible'] = flexible
+        part1 = " OR ".join(quoted[:3])
+        part2 = " OR ".join(quoted[3:6])
+        searches['flexible'] = f'({part1}) AND ({part2})' if part2 else f'({part1})'
     
     # 3. Title + Key Skills
-    skills_part = " AND ".join([f'"{skill}"' for skill in top_skills[:5]])
-    title_search = f'(title:"{role_title}") AND ({skills_part})'
-    searches['with_title'] = title_search
+    skills_part = " AND ".join(quoted[:5])
+    searches['with_title'] = f'(title:"{role_title}") AND ({skills_part})'
     
     # 4. Simple comma-separated for LinkedIn Skills filter
-    skills_filter = ", ".join(top_skills[:10])
-    searches['skills_filter'] = skills_filter
+    searches['skills_filter'] = ", ".join(top_skills[:10])
     
     # 5. X-Ray Search (for Google/LinkedIn combination)
-    xray_skills = " ".join([f'"{skill}"' for skill in top_skills[:6]])
-    xray_search = f'site:linkedin.com/in/ "{role_title}" {xray_skills}'
-    searches['xray'] = xray_search
+    xray_skills = " ".join(quoted[:6])
+    searches['xray'] = f'site:linkedin.com/in/ "{role_title}" {xray_skills}'
     
     return searches
 
+# How long extracted PDF/DOCX text stays cached, keyed by file content
+EXTRACTED_TEXT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Pages of an uploaded PDF that are read. A JD is a few pages; the cap bounds
+# the work on huge or pathological files, which can't be interrupted once
+# the upload request is parsing them. Longer PDFs are read from both ends,
+# like truncate_jd_text, since requirements are often listed last.
+MAX_JD_PDF_PAGES = 20
+
+# Most JD tokens sent to the model (see truncate_jd_text). When tiktoken is
+# unavailable the text is cut at MAX_JD_PROMPT_CHARS instead, roughly the
+# same budget. Long JDs keep their start plus the last quarter of the
+# budget from their end, where requirements and qualifications tend to be.
+MAX_JD_PROMPT_TOKENS = 3000
+MAX_JD_PROMPT_CHARS = 12000
+JD_PROMPT_TAIL_SHARE = 0.25
+JD_TRUNCATION_MARK = "\n...\n"
+
+SKILL_EXTRACTION_MODEL = "gpt-4o-mini"
+
+SKILL_EXTRACTION_TEMPERATURE = 0.2
+
+# Extracted skills are cached by normalized JD text (see skill_cache_key)
+# in the persistent 'llm' cache
+SKILL_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Parsed sheet skills are keyed by the Skills column's contents, so they
+# outlive the few-minute frame cache and survive refetches of unchanged sheets
+SHEET_SKILLS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# A word of a skill name, keeping symbols that distinguish skills
+# ("c++", "c#", ".net", "node.js") but not surrounding punctuation
+SKILL_WORD = re.compile(r'\.?[\w+#]+(?:\.[\w+#]+)*')
+
+# JDs sent per chat completion in extract_skills_from_jds. Each JD is already
+# capped at MAX_JD_PROMPT_TOKENS, so the prompt stays well inside the context window.
+JD_BATCH_SIZE = 8
+
+# Output budget per JD, capped at the model's completion limit
+MAX_TOKENS_PER_JD = 2000
+MAX_COMPLETION_TOKENS = 16000
+
+# The SDK retries rate-limit and timeout errors itself with exponential backoff
+OPENAI_MAX_RETRIES = 3
+
+# Connection pool of the shared sync client, sized for concurrent request threads
+OPENAI_MAX_CONNECTIONS = 20
+
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+def get_openai_client():
+    '''Return the shared OpenAI client, creating it on first use'''
+    global _openai_client
+    if _openai_client is None:
+        with _openai_client_lock:
+            if _openai_client is None:
+                # One client per process reuses its HTTP connection pool across requests
+                _openai_client = OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    max_retries=OPENAI_MAX_RETRIES,
+                    http_client=DefaultHttpxClient(limits=httpx.Limits(
+                        max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_MAX_CONNECTIONS
+                    ))
+                )
+    return _openai_client
+
 def extract_text_from_file(file_path):
     '''Extract text from TXT, PDF, or DOCX files'''
     ext = Path(file_path).suffix.lower()
@@ -53,16 +154,18 @@ def extract_text_from_file(file_path):
             with open(file_path, 'r', encoding='utf-8') as f:
                 return f.read()
         
-        elif ext == '.pdf':
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+        elif ext in ('.pdf', '.docx'):
+            # Parsing dominates upload time, so reuse text from an identical earlier file
+            cache_key = f"jdtext:{ext}:{file_content_hash(file_path)}"
+            text = cache.get(cache_key)
+            if text is None:
+                if ext == '.pdf':
+                    text = extract_text_from_pdf(file_path)
+                else:
+                    text = extract_text_from_docx(file_path)
+                if text:
+                    cache.set(cache_key, text, EXTRACTED_TEXT_CACHE_TIMEOUT)
             return text
-        
-        elif ext == '.docx':
-            doc = Document(file_path)
-            return '\n'.join([para.text for para in doc.paragraphs])
     
     except Exception as e:
         print(f"Error extracting text from {file_path}: {e}")
@@ -70,116 +173,261 @@ def extract_text_from_file(file_path):
     
     return ""
 
+def file_content_hash(file_path, chunk_size=1 << 16):
+    '''Hex digest of a file's contents, read in fixed-size chunks'''
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# WordprocessingML elements that make up paragraph text in word/document.xml
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+WORD_PARAGRAPH = f'{WORD_NS}p'
+WORD_TEXT_TAGS = {f'{WORD_NS}t': None, f'{WORD_NS}tab': '\t', f'{WORD_NS}br': '\n', f'{WORD_NS}cr': '\n'}
+
+def extract_text_from_docx(file_path):
+    '''Extract paragraph text from a DOCX by streaming word/document.xml,
+    without building python-docx's object model'''
+    try:
+        paragraphs = []
+        with zipfile.ZipFile(file_path) as docx, docx.open('word/document.xml') as xml:
+            for _, paragraph in etree.iterparse(xml, tag=WORD_PARAGRAPH):
+                paragraphs.append(''.join(
+                    element.text or '' if WORD_TEXT_TAGS[element.tag] is None else WORD_TEXT_TAGS[element.tag]
+                    for element in paragraph.iter(*WORD_TEXT_TAGS)
+                ))
+                # Free parsed paragraphs as we go (this also keeps text-box
+                # paragraphs from being read again with their outer paragraph)
+                paragraph.clear()
+                while paragraph.getprevious() is not None:
+                    del paragraph.getparent()[0]
+        return '\n'.join(paragraphs)
+    except (KeyError, zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+        print(f"⚠️ Could not read DOCX XML directly: {e}, falling back to python-docx")
+        doc = Document(file_path)
+        return '\n'.join([para.text for para in doc.paragraphs])
+
+def jd_pdf_page_indexes(page_count):
+    '''Indexes of the pages read from a PDF: all of them, or for PDFs over
+    MAX_JD_PDF_PAGES its first and last pages (JD_PROMPT_TAIL_SHARE of them last)'''
+    if page_count <= MAX_JD_PDF_PAGES:
+        return list(range(page_count))
+    tail_pages = int(MAX_JD_PDF_PAGES * JD_PROMPT_TAIL_SHARE)
+    return [*range(MAX_JD_PDF_PAGES - tail_pages), *range(page_count - tail_pages, page_count)]
+
+def extract_text_from_pdf(file_path):
+    '''Extract text from the pages of a PDF given by jd_pdf_page_indexes, using PDFium when available'''
+    if pdfium is not None:
+        try:
+            return extract_text_from_pdf_pdfium(file_path)
+        except Exception as e:
+            # PyPDF2 is more forgiving of some malformed files
+            print(f"⚠️ PDFium could not read {file_path}: {e}, trying PyPDF2")
+    
+    reader = PdfReader(file_path)
+    return "".join(
+        f"{reader.pages[index].extract_text() or ''}\n" for index in jd_pdf_page_indexes(len(reader.pages))
+    )
+
+def extract_text_from_pdf_pdfium(file_path):
+    '''extract_text_from_pdf() with PDFium'''
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages = []
+        for index in jd_pdf_page_indexes(len(pdf)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return "\n".join(pages) + "\n"
+    finally:
+        pdf.close()
+
 def extract_skills_from_jd(jd_text, domain_hint=""):
     '''Extract ALL skills comprehensively from job description using OpenAI API'''
+    return extract_skills_from_jds([jd_text], domain_hint)[0]
+
+def extract_skills_from_jds(jd_texts, domain_hint=""):
+    '''Extract skills from several JDs, sending them to OpenAI in batches.
+    Returns one result dict per JD, in the same order as jd_texts.'''
     try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        client = get_openai_client()
     except Exception as e:
         print(f"Error initializing OpenAI client: {e}")
-        return get_default_error_response()
+        return [get_default_error_response() for _ in jd_texts]
     
-    domain_context = f"The job is in the {domain_hint} domain." if domain_hint else ""
+    # Reposted or re-saved JDs reuse the earlier result instead of a new API call
+    llm_cache = caches['llm']
+    cache_keys = [skill_cache_key(jd_text, domain_hint) for jd_text in jd_texts]
+    cached = llm_cache.get_many(cache_keys)
+    misses = [i for i, key in enumerate(cache_keys) if key not in cached]
     
-    prompt = f'''
-You are an expert HR recruitment assistant AI. Carefully analyze the following Job Description and extract EVERY skill, technology, tool, qualification, and competency mentioned.
-
-Return a structured JSON with:
-
-1. "all_skills": A comprehensive list of ALL skills mentioned in the JD including:
-   - Technical skills (programming languages, tools, frameworks, technologies)
-   - Functional skills (domain-specific abilities)
-   - Software/Tools (any applications, platforms, or systems)
-   - Methodologies (Agile, Scrum, Six Sigma, etc.)
-   - Certifications or qualifications mentioned
-   - Domain knowledge areas
-   - Soft skills (communication, leadership, teamwork, etc.)
-   
-   Extract 15-30 skills. Be thorough and don't miss anything mentioned in the JD.
+    fresh = []
+    for batch in batch_jd_texts([jd_texts[i] for i in misses]):
+        fresh.extend(extract_skills_batch(client, batch, domain_hint))
+    
+    error_response = get_default_error_response()
+    llm_cache.set_many(
+        {cache_keys[i]: result for i, result in zip(misses, fresh) if result != error_response},
+        SKILL_CACHE_TIMEOUT
+    )
+    
+    results = [cached.get(key) for key in cache_keys]
+    for i, result in zip(misses, fresh):
+        results[i] = result
+    return results
 
-2. "skill_categories": Organize the skills into categories like:
-   {{"Technical": [...], "Tools": [...], "Soft Skills": [...], "Domain Knowledge": [...], "Certifications": [...]}}
-   
-3. "linkedin_optimized_skills": A list of 8-15 MOST IMPORTANT skills optimized for LinkedIn Recruiter search. 
-   - Focus on searchable, industry-standard terms
-   - Remove generic terms like "communication" or "teamwork"
-   - Prioritize: specific technologies, tools, certifications, frameworks
-   - Use exact names as they appear on LinkedIn (e.g., "JavaScript" not "JS", "Amazon Web Services (AWS)" not just "AWS")
+def skill_cache_key(jd_text, domain_hint=""):
+    '''Cache key for a JD's extracted skills, ignoring case and whitespace so
+    reformatted reposts share an entry. Punctuation is kept: it tells skills
+    like "C", "C++" and "C#" apart.'''
+    normalized = " ".join(truncate_jd_text(jd_text).lower().split())
+    digest = hashlib.blake2b(f"{domain_hint}|{normalized}".encode("utf-8"), digest_size=16)
+    return f"jdskills:v2:{SKILL_EXTRACTION_MODEL}:{SKILL_EXTRACTION_TEMPERATURE}:{digest.hexdigest()}"
 
-4. "role_category": The most suitable role category (e.g., HR, Marketing, IT, Finance, Sales, Operations, etc.)
+def batch_jd_texts(jd_texts):
+    '''Group truncated JD texts into batches of up to JD_BATCH_SIZE'''
+    for start in range(0, len(jd_texts), JD_BATCH_SIZE):
+        yield [truncate_jd_text(jd_text) for jd_text in jd_texts[start:start + JD_BATCH_SIZE]]
 
-5. "experience_level": one of ["Entry Level", "Mid Level", "Senior Level", "Executive Level"]
+@lru_cache(maxsize=1)
+def get_jd_encoding():
+    '''Tokenizer of the skill extraction model, or None if tiktoken can't load it'''
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(SKILL_EXTRACTION_MODEL)
+    except Exception as e:
+        # The encoding file is downloaded on first use
+        print(f"⚠️ Could not load tokenizer for {SKILL_EXTRACTION_MODEL}: {e}, truncating by characters")
+        return None
 
-6. "key_responsibilities": List 5-7 main responsibilities mentioned in the JD
+def truncate_jd_text(jd_text):
+    '''Cut a JD to the prompt budget of MAX_JD_PROMPT_TOKENS model tokens, keeping its start and end'''
+    encoding = get_jd_encoding()
+    if encoding is None:
+        if len(jd_text) <= MAX_JD_PROMPT_CHARS:
+            return jd_text
+        tail_chars = int(MAX_JD_PROMPT_CHARS * JD_PROMPT_TAIL_SHARE)
+        return jd_text[:MAX_JD_PROMPT_CHARS - tail_chars] + JD_TRUNCATION_MARK + jd_text[-tail_chars:]
+    
+    # Tokens rarely exceed a few characters, so of a very long JD only encode
+    # the ends that could be kept, in the same single pass
+    window = MAX_JD_PROMPT_TOKENS * 10
+    text = jd_text if len(jd_text) <= 2 * window else jd_text[:window] + jd_text[-window:]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= MAX_JD_PROMPT_TOKENS and text is jd_text:
+        return jd_text
+    
+    tail_tokens = int(MAX_JD_PROMPT_TOKENS * JD_PROMPT_TAIL_SHARE)
+    return (
+        encoding.decode(tokens[:MAX_JD_PROMPT_TOKENS - tail_tokens]) + JD_TRUNCATION_MARK
+        + encoding.decode(tokens[-tail_tokens:])
+    )
 
-7. "qualifications": Educational requirements and certifications
+# Static instructions for skill extraction, sent as the system message;
+# the JDs of each call go in the user message
+SKILL_EXTRACTION_INSTRUCTIONS = '''You are an expert HR recruitment assistant. For each job description (JD) you are given, extract EVERY skill, technology, tool, qualification and competency it mentions.
 
-{domain_context}
+Input: a JSON array of {"id", "text"} JDs, optionally preceded by their domain.
+Output: a JSON object {"results": [...]} with one object per JD containing:
+- "id": the JD's id
+- "all_skills": 15-30 skills: technical and functional skills, software/tools, methodologies, certifications, domain knowledge, soft skills
+- "skill_categories": the skills grouped as {"Technical": [...], "Tools": [...], "Soft Skills": [...], "Domain Knowledge": [...], "Certifications": [...]}
+- "linkedin_optimized_skills": the 8-15 most important searchable, industry-standard terms, named as on LinkedIn ("JavaScript" not "JS"), no generic soft skills
+- "role_category": e.g. HR, Marketing, IT, Finance, Sales, Operations
+- "experience_level": one of "Entry Level", "Mid Level", "Senior Level", "Executive Level"
+- "key_responsibilities": the 5-7 main responsibilities
+- "qualifications": educational requirements and certifications
+'''
 
-Be extremely thorough. If someone reads only your extracted skills, they should fully understand what this job requires.
+def skill_completion_params(jd_texts, domain_hint=""):
+    '''Chat completion arguments that extract skills for one batch of JDs'''
+    domain_context = f"The jobs are in the {domain_hint} domain.\n" if domain_hint else ""
+    jds = json.dumps([{"id": i, "text": text} for i, text in enumerate(jd_texts)], ensure_ascii=False)
+    
+    return {
+        "model": SKILL_EXTRACTION_MODEL,
+        "messages": [
+            {"role": "system", "content": SKILL_EXTRACTION_INSTRUCTIONS},
+            {"role": "user", "content": f"{domain_context}JDs:\n{jds}"}
+        ],
+        "temperature": SKILL_EXTRACTION_TEMPERATURE,
+        # JSON mode: the reply is always a bare JSON object, never fenced
+        "response_format": {"type": "json_object"},
+        "max_tokens": min(MAX_TOKENS_PER_JD * len(jd_texts), MAX_COMPLETION_TOKENS),
+    }
 
-Return ONLY valid JSON, no code block, no markdown, no explanation.
+def extract_skills_batch(client, jd_texts, domain_hint=""):
+    '''Extract skills for one batch of JDs with a single chat completion'''
+    try:
+        response = client.chat.completions.create(**skill_completion_params(jd_texts, domain_hint))
+        return parse_skill_results(response.choices[0].message.content, len(jd_texts))
 
-JD:
-{jd_text[:4000]}
-'''
+    except Exception as e:
+        print(f"❌ Error calling OpenAI API: {e}")
+        return [get_default_error_response() for _ in jd_texts]
 
+def parse_skill_results(content, count):
+    '''Parse a batch extraction response into one normalized result per JD'''
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an AI expert at extracting comprehensive skill requirements from job descriptions. Extract EVERY skill mentioned. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,
-            max_tokens=2000
-        )
-
-        content = response.choices[0].message.content.strip()
+        # Still guarded: a reply cut off at max_tokens is not valid JSON
+        parsed = json.loads(content)
+        items = [item for item in parsed.get("results", []) if isinstance(item, dict)]
+        try:
+            # The model may echo ids back as strings ("0")
+            by_id = {int(item.get("id")): item for item in items}
+        except (TypeError, ValueError):
+            # Without usable ids, take the results in the order of the JDs
+            by_id = dict(enumerate(items))
         
-        # Clean content in case it includes markdown ```json``` wrapping
-        cleaned = re.sub(r"^```json\s*|\s*```$", "", content, flags=re.MULTILINE).strip()
+        # A JD the model skipped gets the error response rather than shifting the others
+        return [
+            normalize_skill_result(by_id[i]) if i in by_id else get_default_error_response()
+            for i in range(count)
+        ]
 
-        try:
-            result = json.loads(cleaned)
-            
-            # Validate and normalize expected keys
-            
-            if "linkedin_optimized_skills" not in result:
-                result["linkedin_optimized_skills"] = result.get("all_skills", [])[:10]
-                
-            if "all_skills" not in result:
-                result["all_skills"] = []
-            
-            if "skill_categories" not in result:
-                result["skill_categories"] = {}
-                
-            if "role_category" not in result:
-                result["role_category"] = "Unknown"
-                
-            if "experience_level" not in result:
-                result["experience_level"] = "Unknown"
-                
-            if "key_responsibilities" not in result:
-                result["key_responsibilities"] = []
-                
-            if "qualifications" not in result:
-                result["qualifications"] = []
-            
-            return result
+    except (json.JSONDecodeError, AttributeError) as je:
+        print(f"⚠️ JSON Decode Error: {je}")
+        print(f"⚠️ Raw LLM Output: {content}")
+        return [get_default_error_response() for _ in range(count)]
 
-        except json.JSONDecodeError as je:
-            print(f"⚠️ JSON Decode Error: {je}")
-            print(f"⚠️ Raw LLM Output: {content}")
-            return get_default_error_response()
+def normalize_skill_result(result):
+    '''Validate and normalize expected keys of one extracted JD result'''
+    result.pop("id", None)
+    
+    if "linkedin_optimized_skills" not in result:
+        result["linkedin_optimized_skills"] = result.get("all_skills", [])[:10]
+        
+    if "all_skills" not in result:
+        result["all_skills"] = []
+    
+    if "skill_categories" not in result:
+        result["skill_categories"] = {}
+        
+    if "role_category" not in result:
+        result["role_category"] = "Unknown"
+        
+    if "experience_level" not in result:
+        result["experience_level"] = "Unknown"
+        
+    if "key_responsibilities" not in result:
+        result["key_responsibilities"] = []
+        
+    if "qualifications" not in result:
+        result["qualifications"] = []
+    
+    return result
 
-    except Exception as e:
-        print(f"❌ Error calling OpenAI API: {e}")
-        return get_default_error_response()
+# Only skill of the default error response
+SKILL_EXTRACTION_ERROR = "Error extracting skills - please try again"
 
 def get_default_error_response():
     '''Return default response when API fails'''
     return {
-        "all_skills": ["Error extracting skills - please try again"],
+        "all_skills": [SKILL_EXTRACTION_ERROR],
         "skill_categories": {},
         "role_category": "Unknown",
         "experience_level": "Unknown",
@@ -187,10 +435,26 @@ def get_default_error_response():
         "qualifications": []
     }
 
+def skills_map_mtime():
+    '''Modification time of the skills map file, or None if it is missing'''
+    try:
+        return settings.SKILLS_MAP_PATH.stat().st_mtime
+    except OSError:
+        return None
+
 def load_skills_map():
-    '''Load skills mapping from JSON file or return default'''
+    '''Load skills mapping from JSON file or return default (re-read only when the file changes)'''
+    return load_skills_map_for(skills_map_mtime())
+
+def load_skills_map_lower():
+    '''Skills map keyed by lowercased skill name, for case-insensitive lookups'''
+    return load_skills_map_lower_for(skills_map_mtime())
+
+@lru_cache(maxsize=1)
+def load_skills_map_for(mtime):
+    '''Parse the skills map file as of the given modification time'''
     try:
-        if settings.SKILLS_MAP_PATH.exists():
+        if mtime is not None:
             with open(settings.SKILLS_MAP_PATH, 'r', encoding='utf-8') as f:
                 content = f.read().strip()
                 if not content:
@@ -204,6 +468,14 @@ def load_skills_map():
         print(f"⚠️ Error loading skills map: {e}, using default")
         return get_default_skills_map()
 
+@lru_cache(maxsize=1)
+def load_skills_map_lower_for(mtime):
+    skills_map_lower = {}
+    for map_skill, related in load_skills_map_for(mtime).items():
+        # First entry wins, as with the previous linear scan
+        skills_map_lower.setdefault(map_skill.lower(), related)
+    return skills_map_lower
+
 def get_default_skills_map():
     '''Return comprehensive default skills mapping'''
     return {
@@ -231,33 +503,29 @@ def get_default_skills_map():
 def expand_skills_with_map(primary_skills, secondary_skills):
     '''Expand secondary skills based on primary skills using skills map'''
     skills_map = load_skills_map()
+    skills_map_lower = load_skills_map_lower()
     expanded_secondary = set(secondary_skills) if secondary_skills else set()
     
     for skill in primary_skills:
-        # Check exact match
-        if skill in skills_map:
-            expanded_secondary.update(skills_map[skill])
-        # Check case-insensitive match
-        else:
-            for map_skill, related in skills_map.items():
-                if skill.lower() == map_skill.lower():
-                    expanded_secondary.update(related)
-                    break
+        # Check exact match, then case-insensitive match
+        related = skills_map.get(skill)
+        if related is None:
+            related = skills_map_lower.get(skill.lower())
+        if related:
+            expanded_secondary.update(related)
     
     return list(expanded_secondary)
 
 def delete_file_after_delay(file_path, delay_seconds=5):
     '''Delete a file after delay in background thread'''
-    import time
-    import threading
-    
     def delete_file():
         if delay_seconds > 0:
             time.sleep(delay_seconds)
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"✅ Deleted file: {file_path}")
+            os.remove(file_path)
+            print(f"✅ Deleted file: {file_path}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"⚠️ Could not delete file {file_path}: {e}")
     
@@ -293,31 +561,67 @@ def cleanup_old_matched_files(days=1):
         print(f"✅ Cleanup complete: {deleted_count} old files deleted")
         
 
-def fetch_google_sheet_data(sheet_id, credentials_path=None):
+GOOGLE_SHEETS_SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    'https://www.googleapis.com/auth/drive.readonly'
+]
+
+_gspread_client = None
+_gspread_client_lock = threading.Lock()
+
+def get_gspread_client(credentials_path=None):
     '''
-    Fetch candidate data from Google Sheets
+    Return a gspread client for the given service account info (a dict)
+    
+    The client for the configured credentials is shared, so its access
+    token and HTTP session are reused across fetches.
     '''
     import gspread
     from google.oauth2.service_account import Credentials
     
+    global _gspread_client
+    if credentials_path is not None:
+        return gspread.authorize(Credentials.from_service_account_info(credentials_path, scopes=GOOGLE_SHEETS_SCOPES))
+    
+    if _gspread_client is None:
+        with _gspread_client_lock:
+            if _gspread_client is None:
+                creds = Credentials.from_service_account_info(settings.GOOGLE_SHEETS_CREDENTIALS, scopes=GOOGLE_SHEETS_SCOPES)
+                _gspread_client = gspread.authorize(creds)
+    return _gspread_client
+
+def fetch_google_sheet_data(sheet_id, credentials_path=None, columns=None):
+    '''
+    Fetch candidate data from Google Sheets
+    
+    Rows are read as a plain 2D list of cell values and turned straight into
+    a DataFrame, with numeric-looking cells converted to numbers as
+    get_all_records() does. When columns is given, only those columns
+    (matched by header) are downloaded.
+    '''
+    from gspread.utils import numericise_all, rowcol_to_a1
+    
     try:
-        if credentials_path is None:
-            credentials_path = settings.GOOGLE_SHEETS_CREDENTIALS  # this is a dict
-        
-        scopes = [
-            'https://www.googleapis.com/auth/spreadsheets.readonly',
-            'https://www.googleapis.com/auth/drive.readonly'
-        ]
-        
-        # ✅ use from_service_account_info for dict
-        creds = Credentials.from_service_account_info(credentials_path, scopes=scopes)
-        client = gspread.authorize(creds)
+        client = get_gspread_client(credentials_path)
         
         spreadsheet = client.open_by_key(sheet_id)
         worksheet = spreadsheet.sheet1
         
-        data = worksheet.get_all_records()
-        df = pd.DataFrame(data)
+        if columns is None:
+            values = worksheet.get_values()
+            header, rows = (values[0], values[1:]) if values else ([], [])
+            df = pd.DataFrame([numericise_all(row[:len(header)]) for row in rows], columns=header)
+        else:
+            # Fetch the header row, then just the wanted columns in one batch request
+            wanted = {column.strip() for column in columns}
+            header = [(index, name) for index, name in enumerate(worksheet.row_values(1), start=1) if name.strip() in wanted]
+            ranges = [f"{rowcol_to_a1(2, index)}:{rowcol_to_a1(worksheet.row_count, index)}" for index, _ in header]
+            column_values = worksheet.batch_get(ranges) if ranges else []
+            row_count = max((len(values) for values in column_values), default=0)
+            df = pd.DataFrame({
+                name: numericise_all([row[0] if row else '' for row in values] + [''] * (row_count - len(values)))
+                for (_, name), values in zip(header, column_values)
+            })
         
         print(f"✅ Successfully fetched {len(df)} rows from Google Sheet")
         return df
@@ -327,6 +631,224 @@ def fetch_google_sheet_data(sheet_id, credentials_path=None):
         return pd.DataFrame()
 
 
+def fetch_google_sheet_data_cached(sheet_id, columns=None, refresh=False):
+    '''
+    fetch_google_sheet_data() through the 'sheets' cache
+    
+    A frame fetched in the last few minutes (by a sync, or an earlier match)
+    is reused instead of calling the Sheets API again. refresh=True always
+    fetches and replaces the cached frame.
+    '''
+    sheet_cache = caches['sheets']
+    full_key = f"sheet:{sheet_id}"
+    if columns is None:
+        keys = [full_key]
+    else:
+        columns = sorted(column.strip() for column in columns)
+        digest = hashlib.blake2b("|".join(columns).encode("utf-8"), digest_size=8).hexdigest()
+        keys = [full_key, f"sheet:{sheet_id}:{digest}"]
+    
+    if not refresh:
+        for key in keys:
+            df = sheet_cache.get(key)
+            if df is not None:
+                if columns is not None:
+                    df = df[[column for column in df.columns if column.strip() in columns]]
+                return df
+    
+    df = fetch_google_sheet_data(sheet_id, columns=columns)
+    if not df.empty:
+        sheet_cache.set(keys[-1], df)
+    return df
+
+
+# Output field -> source column for each candidate database layout
+SHEET_CANDIDATE_COLUMNS = {
+    'name': 'Candidate Name',
+    'email': 'Email',
+    'contact': 'Contact',
+    'location': 'Location',
+    'current_company': 'Current Company',
+    'designation': 'Designation',
+    'experience': 'Experience',
+    'linkedin': 'LinkedIn',
+    'qualification': 'Qualification',
+    'skills': 'Skills',
+    'cv_link': 'CV Link',
+    'status': 'Status',
+}
+
+EXCEL_CANDIDATE_COLUMNS = {
+    'name': 'Candidate Name',
+    'email': 'Email of Candidate',
+    'contact': 'Contact Number',
+    'location': 'Candidate Location',
+    'current_company': 'Current Company',
+    'designation': 'Current Designation',
+    'experience': 'Experience',
+    'linkedin': 'Linkedin URL',
+    'qualification': 'Qualification',
+    'skills': 'Skills',
+    'cv_link': 'Candidate CV Path',
+    'status': 'Candidate Status',
+}
+
+
+def skill_phrase(skill):
+    '''Space-padded words of a lowercased skill, for whole-word containment checks'''
+    words = SKILL_WORD.findall(skill)
+    return f" {' '.join(words)} " if words else ""
+
+def word_subphrases(phrase):
+    '''Every run of consecutive words in a skill phrase, as space-padded phrases'''
+    words = phrase.split()
+    return {
+        f" {' '.join(words[start:end])} "
+        for start in range(len(words))
+        for end in range(start + 1, len(words) + 1)
+    }
+
+def required_phrase_offsets(text, required_phrases):
+    '''
+    Start offset of every occurrence of each required phrase in text
+    
+    With pyahocorasick installed, all phrases are found in a single pass
+    over text; otherwise each phrase is searched for in turn.
+    
+    Returns:
+        List of start offsets for each required phrase
+    '''
+    offsets = [[] for _ in required_phrases]
+    if ahocorasick is None:
+        for column, req in enumerate(required_phrases):
+            if req:
+                offsets[column] = [match.start() for match in re.finditer(re.escape(req), text)]
+        return offsets
+    
+    automaton = ahocorasick.Automaton()
+    for column, req in enumerate(required_phrases):
+        if req:
+            columns = automaton.get(req, [])
+            columns.append(column)
+            automaton.add_word(req, columns)
+    if len(automaton) == 0:
+        return offsets
+    automaton.make_automaton()
+    
+    for end, columns in automaton.iter(text):
+        start = end - len(required_phrases[columns[0]]) + 1
+        for column in columns:
+            offsets[column].append(start)
+    return offsets
+
+def phrase_hit_matrix(phrases, required_phrases):
+    '''
+    Which required skill phrases match each candidate skill phrase, in either direction
+    
+    For "required inside candidate" it searches one newline-joined string of
+    the phrases for every required skill (see required_phrase_offsets) and
+    maps each hit offset back to its phrase. For "candidate inside required"
+    it looks the phrases up in the set of each required skill's word runs.
+    
+    Returns:
+        Boolean DataFrame with one row per phrase and one column per required skill
+    '''
+    phrases = pd.Series(phrases, dtype=object)
+    text = "\n".join(phrases)
+    phrase_starts = np.concatenate(([0], np.cumsum(phrases.str.len().to_numpy(dtype=np.int64) + 1)[:-1]))
+    
+    hits = np.zeros((len(phrases), len(required_phrases)), dtype=bool)
+    for column, (req, offsets) in enumerate(zip(required_phrases, required_phrase_offsets(text, required_phrases))):
+        if not req:
+            continue
+        if offsets:
+            hits[np.searchsorted(phrase_starts, offsets, side='right') - 1, column] = True
+        hits[:, column] |= phrases.isin(word_subphrases(req)).to_numpy()
+    return pd.DataFrame(hits)
+
+# Parsed Skills column of a candidate DataFrame (see prepare_candidate_skills)
+CandidateSkills = namedtuple('CandidateSkills', ['rows', 'skill_rows', 'row_starts', 'codes', 'phrases'])
+
+def prepare_candidate_skills(df):
+    '''
+    Lowercase and split every row's Skills once
+    
+    All rows' skills are kept in one flat array of codes into the word
+    phrases of the distinct skills, with each row's skills stored
+    consecutively. row_starts is the offset of each row's first skill in
+    that array and skill_rows the row it belongs to; rows is every row with
+    a non-empty Skills cell.
+    '''
+    skills = df['Skills'].fillna('').astype(str).str.lower()
+    skills = skills[(skills.str.strip() != '') & (skills != 'nan')]
+    
+    # One entry per (row, candidate skill), indexed by the row it came from
+    tokens = skills.str.split(',').explode().str.strip()
+    tokens = tokens[tokens != '']
+    
+    codes, unique_tokens = pd.factorize(tokens)
+    token_rows = tokens.index.to_numpy()
+    row_starts = np.flatnonzero(np.r_[True, token_rows[1:] != token_rows[:-1]][:len(token_rows)])
+    return CandidateSkills(
+        skills.index, tokens.index[row_starts], row_starts, codes, [skill_phrase(token) for token in unique_tokens]
+    )
+
+
+def match_candidates_in_dataframe(df, required_skills, min_match_percentage, columns, candidate_skills=None):
+    '''
+    Score every candidate row of df against the required skills
+    
+    Candidate skills are comma-separated. Each distinct skill string is
+    compared word by word with the required skills once (so "java" does not
+    match "javascript"), and the results are rolled up per row over the
+    flat skill arrays, instead of re-comparing every row's skills.
+    Pass candidate_skills from prepare_candidate_skills() to reuse the
+    parsed skills of a DataFrame across several matches.
+    
+    Returns:
+        DataFrame of matched candidates with match scores, best match first
+    '''
+    if candidate_skills is None:
+        candidate_skills = prepare_candidate_skills(df)
+    
+    # Normalize required skills for comparison
+    required_skills_lower = [skill.lower().strip() for skill in required_skills]
+    total_required = len(required_skills_lower)
+    
+    # Compare each distinct candidate skill with the required skills: a match
+    # is one skill's words appearing as a whole-word phrase inside the other's
+    required_phrases = [skill_phrase(req_skill) for req_skill in required_skills_lower]
+    token_hits = phrase_hit_matrix(candidate_skills.phrases, required_phrases)
+    
+    # A row matches a required skill if any of its skills does
+    skill_hits = token_hits.to_numpy()[candidate_skills.codes]
+    if len(skill_hits):
+        skill_hits = np.logical_or.reduceat(skill_hits, candidate_skills.row_starts, axis=0)
+    row_hits = pd.DataFrame(skill_hits, index=candidate_skills.skill_rows).reindex(candidate_skills.rows, fill_value=False)
+    match_counts = row_hits.sum(axis=1)
+    match_percentages = match_counts / total_required * 100 if total_required else match_counts * 0.0
+    
+    # Only include candidates above threshold
+    selected = match_percentages >= min_match_percentage
+    selected_index = selected[selected].index
+    
+    # Build the output columns for the selected rows only, then emit one dict per row
+    output = pd.DataFrame(
+        {field: df[column] if column in df.columns else 'N/A' for field, column in columns.items()},
+        index=df.index
+    ).loc[selected_index]
+    matched_skills = [
+        [req_skill for req_skill, hit in zip(required_skills_lower, hits) if hit]
+        for hits in row_hits.loc[selected_index].to_numpy()
+    ]
+    output['matched_skills'] = matched_skills
+    output['match_percentage'] = match_percentages[selected_index].round(1)
+    output['matched_skills_count'] = [len(row_skills) for row_skills in matched_skills]
+    output['total_required_skills'] = total_required
+    
+    # Sort by match percentage (highest first), keeping sheet order among ties
+    return output.sort_values('match_percentage', ascending=False, kind='stable')
+
 
 def match_candidates_from_google_sheet(sheet_id, required_skills, min_match_percentage=50):
     '''
@@ -338,15 +860,15 @@ def match_candidates_from_google_sheet(sheet_id, required_skills, min_match_perc
         min_match_percentage: Minimum percentage of skills that must match
     
     Returns:
-        List of matched candidates with match scores
+        DataFrame of matched candidates with match scores (empty if none)
     '''
     try:
         # Fetch data from Google Sheets
-        df = fetch_google_sheet_data(sheet_id)
+        df = fetch_google_sheet_data_cached(sheet_id, columns=SHEET_CANDIDATE_COLUMNS.values())
         
         if df.empty:
             print("No data found in Google Sheet")
-            return []
+            return pd.DataFrame()
         
         # Normalize column names
         df.columns = df.columns.str.strip()
@@ -355,68 +877,67 @@ def match_candidates_from_google_sheet(sheet_id, required_skills, min_match_perc
         if 'Skills' not in df.columns:
             print("Error: 'Skills' column not found in Google Sheet")
             print(f"Available columns: {df.columns.tolist()}")
-            return []
-        
-        matched_candidates = []
-        
-        # Normalize required skills for comparison
-        required_skills_lower = [skill.lower().strip() for skill in required_skills]
-        
-        for idx, row in df.iterrows():
-            candidate_skills_str = str(row.get('Skills', ''))
-            
-            if not candidate_skills_str or candidate_skills_str == 'nan':
-                continue
-            
-            # Parse candidate skills (assume comma-separated)
-            candidate_skills = [s.lower().strip() for s in candidate_skills_str.split(',')]
-            
-            # Calculate skill matches
-            matched_skills = []
-            for req_skill in required_skills_lower:
-                for cand_skill in candidate_skills:
-                    # Check for exact match or partial match
-                    if req_skill in cand_skill or cand_skill in req_skill:
-                        matched_skills.append(req_skill)
-                        break
-            
-            # Calculate match percentage
-            match_percentage = (len(matched_skills) / len(required_skills_lower)) * 100 if required_skills_lower else 0
-            
-            # Only include candidates above threshold
-            if match_percentage >= min_match_percentage:
-                candidate_data = {
-                    'name': row.get('Candidate Name', 'N/A'),
-                    'email': row.get('Email', 'N/A'),
-                    'contact': row.get('Contact', 'N/A'),
-                    'location': row.get('Location', 'N/A'),
-                    'current_company': row.get('Current Company', 'N/A'),
-                    'designation': row.get('Designation', 'N/A'),
-                    'experience': row.get('Experience', 'N/A'),
-                    'linkedin': row.get('LinkedIn', 'N/A'),
-                    'qualification': row.get('Qualification', 'N/A'),
-                    'skills': row.get('Skills', 'N/A'),
-                    'cv_link': row.get('CV Link', 'N/A'),
-                    'status': row.get('Status', 'N/A'),
-                    'matched_skills': matched_skills,
-                    'match_percentage': round(match_percentage, 1),
-                    'matched_skills_count': len(matched_skills),
-                    'total_required_skills': len(required_skills_lower)
-                }
-                matched_candidates.append(candidate_data)
+            return pd.DataFrame()
         
-        # Sort by match percentage (highest first)
-        matched_candidates.sort(key=lambda x: x['match_percentage'], reverse=True)
-        
-        return matched_candidates
+        return match_candidates_in_dataframe(
+            df, required_skills, min_match_percentage, SHEET_CANDIDATE_COLUMNS,
+            google_sheet_candidate_skills(sheet_id, df)
+        )
     
     except Exception as e:
         print(f"Error matching candidates from Google Sheet: {e}")
-        return []
+        return pd.DataFrame()
+
+
+def google_sheet_candidate_skills(sheet_id, df):
+    '''
+    prepare_candidate_skills(df) through the 'sheets' cache
     
-import pandas as pd
-from pathlib import Path
-from django.conf import settings  # only if running inside Django
+    Entries are keyed by a hash of the Skills column (values and row
+    labels), so later matches against an unchanged sheet reuse the parsed
+    skills instead of splitting every row again.
+    '''
+    skills_hash = pd.util.hash_pandas_object(df['Skills']).to_numpy()
+    digest = hashlib.blake2b(skills_hash.tobytes(), digest_size=16).hexdigest()
+    key = f"sheetskills:{sheet_id}:{digest}"
+    
+    sheet_cache = caches['sheets']
+    candidate_skills = sheet_cache.get(key)
+    if candidate_skills is None:
+        candidate_skills = prepare_candidate_skills(df)
+        sheet_cache.set(key, candidate_skills, SHEET_SKILLS_CACHE_TIMEOUT)
+    return candidate_skills
+
+
+def count_google_sheet_candidates(sheet_id):
+    '''
+    Number of candidate rows in a Google Sheet, refreshing the cached frame
+    
+    Only the candidate columns matching uses are downloaded, rather than
+    every cell of the sheet. The columns are padded to the longest, so a row
+    counts when any of them is filled in. The fetched frame replaces the one
+    the next match reads from the 'sheets' cache.
+    '''
+    df = fetch_google_sheet_data_cached(sheet_id, columns=SHEET_CANDIDATE_COLUMNS.values(), refresh=True)
+    if df.columns.empty:
+        print(f"⚠️ No candidate columns ({', '.join(SHEET_CANDIDATE_COLUMNS.values())}) found in Google Sheet {sheet_id}")
+    return len(df)
+
+
+def read_candidate_excel(candidate_excel_path):
+    '''Candidate columns of an Excel database and their parsed skills,
+    re-read only when the file changes'''
+    path = Path(candidate_excel_path)
+    return read_candidate_excel_for(str(path.resolve()), path.stat().st_mtime)
+
+@lru_cache(maxsize=4)
+def read_candidate_excel_for(path, mtime):
+    wanted = set(EXCEL_CANDIDATE_COLUMNS.values())
+    df = pd.read_excel(path, engine=EXCEL_READ_ENGINE, usecols=lambda column: str(column).strip() in wanted)
+    
+    # Normalize column names (remove spaces)
+    df.columns = df.columns.str.strip()
+    return df, prepare_candidate_skills(df) if 'Skills' in df.columns else None
 
 def match_candidates_with_jd(candidate_excel_path, required_skills, min_match_percentage=50):
     '''
@@ -431,69 +952,17 @@ def match_candidates_with_jd(candidate_excel_path, required_skills, min_match_pe
         List of matched candidates with match scores
     '''
     try:
-        # Read candidate database
-        df = pd.read_excel(candidate_excel_path)
-        
-        # Normalize column names (remove spaces, lowercase)
-        df.columns = df.columns.str.strip()
+        # Read candidate database (cached until the file changes)
+        df, candidate_skills = read_candidate_excel(candidate_excel_path)
         
         # Check if Skills column exists
         if 'Skills' not in df.columns:
             print("❌ Error: 'Skills' column not found in Excel")
             return []
         
-        matched_candidates = []
-        
-        # Normalize required skills for comparison
-        required_skills_lower = [skill.lower().strip() for skill in required_skills]
-        
-        for _, row in df.iterrows():
-            candidate_skills_str = str(row.get('Skills', ''))
-            
-            if not candidate_skills_str or candidate_skills_str.lower() == 'nan':
-                continue
-            
-            # Parse candidate skills (assume comma-separated)
-            candidate_skills = [s.lower().strip() for s in candidate_skills_str.split(',')]
-            
-            # Calculate skill matches
-            matched_skills = []
-            for req_skill in required_skills_lower:
-                for cand_skill in candidate_skills:
-                    # Check for exact or partial match
-                    if req_skill in cand_skill or cand_skill in req_skill:
-                        matched_skills.append(req_skill)
-                        break
-            
-            # Calculate match percentage
-            match_percentage = (len(matched_skills) / len(required_skills_lower)) * 100 if required_skills_lower else 0
-            
-            # Only include candidates above threshold
-            if match_percentage >= min_match_percentage:
-                candidate_data = {
-                    'name': row.get('Candidate Name', 'N/A'),
-                    'email': row.get('Email of Candidate', 'N/A'),
-                    'contact': row.get('Contact Number', 'N/A'),
-                    'location': row.get('Candidate Location', 'N/A'),
-                    'current_company': row.get('Current Company', 'N/A'),
-                    'designation': row.get('Current Designation', 'N/A'),
-                    'experience': row.get('Experience', 'N/A'),
-                    'linkedin': row.get('Linkedin URL', 'N/A'),
-                    'qualification': row.get('Qualification', 'N/A'),
-                    'skills': row.get('Skills', 'N/A'),
-                    'cv_link': row.get('Candidate CV Path', 'N/A'),
-                    'status': row.get('Candidate Status', 'N/A'),
-                    'matched_skills': matched_skills,
-                    'match_percentage': round(match_percentage, 1),
-                    'matched_skills_count': len(matched_skills),
-                    'total_required_skills': len(required_skills_lower)
-                }
-                matched_candidates.append(candidate_data)
-        
-        # Sort by match percentage (highest first)
-        matched_candidates.sort(key=lambda x: x['match_percentage'], reverse=True)
-        
-        return matched_candidates
+        return match_candidates_in_dataframe(
+            df, required_skills, min_match_percentage, EXCEL_CANDIDATE_COLUMNS, candidate_skills
+        ).to_dict('records')
     
     except Exception as e:
         print(f"❌ Error matching candidates: {e}")
@@ -518,9 +987,24 @@ def export_matched_candidates(matched_candidates, output_path):
         # Only include columns that exist
         column_order = [col for col in column_order if col in df.columns]
         df = df[column_order]
+        if 'matched_skills' in df.columns:
+            df = df.assign(matched_skills=df['matched_skills'].map(str))
+        
+        # Write rows in order with xlsxwriter's constant_memory mode, which
+        # flushes each finished row to disk instead of keeping the sheet in memory
+        workbook = xlsxwriter.Workbook(str(output_path), {'constant_memory': True})
+        try:
+            worksheet = workbook.add_worksheet()
+            header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+            worksheet.write_row(0, 0, df.columns, header_format)
+            
+            # Missing values become blank cells
+            rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+            for row_number, row in enumerate(rows, start=1):
+                worksheet.write_row(row_number, 0, row)
+        finally:
+            workbook.close()
         
-        # Export to Excel
-        df.to_excel(output_path, index=False, engine='openpyxl')
         print(f"✅ Matched candidates exported to: {output_path}")
         return True
     
@@ -529,36 +1013,62 @@ def export_matched_candidates(matched_candidates, output_path):
         return False
 
 
+# Serializes appends to the JD history from the background analysis workers
+_jd_history_lock = threading.Lock()
+
 def save_jd_to_excel(jd_data):
     '''
-    Save job description data to Excel database
+    Save job description data to the JD database
+    
+    Rows are appended to a CSV file, which costs the same however long the
+    history gets. export_jd_history_xlsx() builds the Excel workbook from it.
     '''
     try:
-        excel_path = Path(settings.EXCEL_DATABASE_PATH)
-        data_dir = excel_path.parent
-        
-        df_new = pd.DataFrame([jd_data])
-        
-        if excel_path.exists():
-            try:
-                df_existing = pd.read_excel(excel_path)
-                df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-            except Exception as e:
-                print(f"⚠️ Error reading existing Excel file: {e}, creating new one")
-                df_combined = df_new
-        else:
-            df_combined = df_new
+        csv_path = Path(settings.JD_HISTORY_CSV_PATH)
         
-        # Ensure data directory exists
-        data_dir.mkdir(parents=True, exist_ok=True)
+        with _jd_history_lock:
+            # Ensure data directory exists
+            csv_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Start from the rows already in the Excel database
+            excel_path = Path(settings.EXCEL_DATABASE_PATH)
+            if not csv_path.exists() and excel_path.exists():
+                try:
+                    pd.read_excel(excel_path, engine=EXCEL_READ_ENGINE).to_csv(csv_path, index=False)
+                except Exception as e:
+                    print(f"⚠️ Error reading existing Excel file: {e}, starting a new history")
+            
+            # Reuse the existing header row; a new file gets one from jd_data
+            headers = None
+            if csv_path.exists() and csv_path.stat().st_size:
+                with open(csv_path, newline='', encoding='utf-8') as f:
+                    headers = next(csv.reader(f), None)
+            
+            with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=headers or list(jd_data), restval='', extrasaction='ignore')
+                if not headers:
+                    writer.writeheader()
+                writer.writerow(jd_data)
         
-        # Save to Excel
-        df_combined.to_excel(excel_path, index=False, engine='openpyxl')
-        print(f"✅ Successfully saved JD data to Excel: {excel_path}")
+        print(f"✅ Successfully saved JD data to: {csv_path}")
         
     except Exception as e:
         print(f"❌ Error saving JD data to Excel: {e}")
 
-        
-        
-        
+
+def export_jd_history_xlsx(output_path=None):
+    '''
+    Write the JD history to an Excel workbook (EXCEL_DATABASE_PATH by default)
+    
+    Returns:
+        Path of the workbook, or None if there is no history yet
+    '''
+    csv_path = Path(settings.JD_HISTORY_CSV_PATH)
+    if not csv_path.exists():
+        return None
+    
+    output_path = Path(output_path or settings.EXCEL_DATABASE_PATH)
+    with _jd_history_lock:
+        df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    df.to_excel(output_path, index=False, engine='xlsxwriter')
+    return output_path
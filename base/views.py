@@ -1,22 +1,27 @@
-from django.http import FileResponse, Http404, HttpResponseForbidden
-from django.shortcuts import render, redirect, get_object_or_404
+from django.http import FileResponse, Http404
+from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required, permission_required
-from django.views.decorators.http import require_http_methods, require_POST
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition, require_http_methods, require_POST
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_protect
-from django.core.exceptions import PermissionDenied
-from django.utils.decorators import method_decorator
-from django.db.models import Q
+from django.core.cache import caches
+from django.db.models import Count, Max, Q
 from .forms import JDUploadForm, GoogleSheetForm, CandidateMatchForm
+from .middleware import get_client_ip, log_audit_event
 from .models import JobDescription, GoogleSheetDatabase
-from .utils import (cleanup_old_matched_files, extract_text_from_file, extract_skills_from_jd, save_jd_to_excel, 
-                    generate_linkedin_search_strings, match_candidates_from_google_sheet,
-                    export_matched_candidates, fetch_google_sheet_data)
+from .analysis import JD_ANALYSIS_TIMEOUT, analyze_jd, fail_stale_analyses
+from .utils import (delete_file_after_delay, match_candidates_from_google_sheet,
+                    export_matched_candidates, count_google_sheet_candidates, cleanup_old_matched_files,
+                    SKILL_EXTRACTION_ERROR)
 from datetime import datetime
 from django.conf import settings
 from django.utils import timezone
-import json
+from django.utils.text import slugify
+import hashlib
 import os
+import tempfile
+import uuid
 from pathlib import Path
 import logging
 
@@ -24,29 +29,58 @@ import logging
 logger = logging.getLogger(__name__)
 
 # Constants
-ALLOWED_FILE_EXTENSIONS = ['.pdf', '.docx', '.doc', '.txt']
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_SESSION_CANDIDATES = 100
+MAX_SESSION_MATCHED_SKILLS = 10
+MATCHED_FILES_CLEANUP_INTERVAL = 60 * 60  # seconds
 
-def validate_file_upload(uploaded_file):
-    """Validate uploaded file for security"""
-    # Check file extension
-    ext = os.path.splitext(uploaded_file.name)[1].lower()
-    if ext not in ALLOWED_FILE_EXTENSIONS:
-        return False, f"File type not allowed. Allowed types: {', '.join(ALLOWED_FILE_EXTENSIONS)}"
-    
-    # Check file size
-    if uploaded_file.size > MAX_FILE_SIZE:
-        return False, f"File size exceeds maximum allowed size of {MAX_FILE_SIZE / (1024*1024)}MB"
-    
-    return True, None
+# Candidate fields shown on the matches page
+SESSION_CANDIDATE_FIELDS = [
+    'name', 'email', 'contact', 'designation', 'current_company', 'experience', 'location',
+    'linkedin', 'match_percentage', 'matched_skills_count', 'total_required_skills',
+    'matched_skills', 'cv_link',
+]
+
+def upload_digest(uploaded_file, domain):
+    """SHA-256 of an uploaded file's contents and the analysis domain"""
+    digest = hashlib.sha256(f"{domain}\0".encode('utf-8'))
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def audit(request, action, target=None, details=None):
+    """Record an audit log entry for an action by the requesting user"""
+    log_audit_event(
+        request.user, action, target,
+        # AuditLogMiddleware has usually parsed the address already
+        ip_address=getattr(request, 'ip_address', None) or get_client_ip(request),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        details=details
+    )
 
-def check_object_permission(request, obj):
-    """Check if user has permission to access object"""
-    if hasattr(obj, 'created_by'):
-        if obj.created_by != request.user and not request.user.is_staff:
-            return False
-    return True
+def user_scoped(queryset, user):
+    """
+    Restrict a queryset to objects the user owns (staff see all), so a
+    lookup of someone else's object finds nothing and 404s in the database
+    """
+    return queryset if user.is_staff else queryset.filter(created_by=user)
+
+def get_owned_object_or_404(request, queryset, **lookup):
+    """
+    get_object_or_404 over the objects the user may access (see user_scoped).
+    Someone else's object still 404s, but the attempt is logged and audited.
+    """
+    try:
+        return user_scoped(queryset, request.user).get(**lookup)
+    except queryset.model.DoesNotExist:
+        if not request.user.is_staff and queryset.filter(**lookup).exists():
+            model_name = queryset.model._meta.model_name
+            logger.warning(f"Unauthorized access attempt to {model_name} {lookup} by user {request.user.id}")
+            audit(request, 'PERMISSION_DENIED', details={
+                'target_model': model_name,
+                'lookup': {field: str(value) for field, value in lookup.items()},
+                'path': request.path,
+            })
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
 
 @login_required
 @csrf_protect
@@ -56,130 +90,110 @@ def upload_jd(request):
     if request.method == 'POST':
         form = JDUploadForm(request.POST, request.FILES)
         
-        if form.is_valid():
-            # Validate uploaded file
-            uploaded_file = request.FILES.get('file')
-            is_valid, error_msg = validate_file_upload(uploaded_file)
-            
-            if not is_valid:
+        # The form checks the file's type and size (JDUploadForm.clean_file),
+        # so invalid uploads are turned away before any row or file is written
+        if not form.is_valid() and 'file' in form.errors:
+            for error_msg in form.errors['file']:
                 messages.error(request, error_msg)
                 logger.warning(f"Invalid file upload attempt by user {request.user.id}: {error_msg}")
-                return redirect('upload_jd')
+            return redirect('upload_jd')
+        
+        if form.is_valid():
+            uploaded_file = form.cleaned_data['file']
+            
+            # The same file analyzed for the same domain under the same title
+            # (which the search strings use) gives the same result, so send
+            # re-uploads to the existing analysis: a successful one, or one
+            # still running that hasn't timed out. Failed ones are retried.
+            domain = form.cleaned_data['domain']
+            content_sha256 = upload_digest(uploaded_file, domain)
+            successful = Q(analysis_status='DONE') & ~Q(all_skills=SKILL_EXTRACTION_ERROR)
+            running = Q(analysis_status='PENDING', updated_at__gte=timezone.now() - JD_ANALYSIS_TIMEOUT)
+            existing = JobDescription.objects.filter(
+                successful | running, created_by=request.user, content_sha256=content_sha256,
+                title=form.cleaned_data['title'], is_active=True
+            ).values_list('pk', 'title').first()
+            if existing:
+                messages.info(request, f"This file was already analyzed as \"{existing[1]}\".")
+                return redirect('results', pk=existing[0])
             
             jd = form.save(commit=False)
-            jd.created_by = request.user
-            jd.file = request.FILES['file']# Associate with user
+            jd.created_by = request.user  # Associate with user
+            jd.content_sha256 = content_sha256
+            jd.analysis_status = 'PENDING'
             jd.save()
+            audit(request, 'JD_UPLOAD', jd, {'title': jd.title})
             
-            domain = request.POST.get('domain', '')
-            
-            # Extract text from uploaded file
-            file_path = jd.file.path
-            
-            try:
-                jd_text = extract_text_from_file(file_path)
-                
-                if not jd_text:
-                    messages.error(request, "Could not extract text from the file.")
-                    # Delete the uploaded file
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    jd.delete()
-                    logger.error(f"Text extraction failed for JD {jd.id} by user {request.user.id}")
-                    return redirect('upload_jd')
-                
-                # Store extracted text in database
-                jd.jd_text = jd_text
-                
-                # Extract comprehensive skills using OpenAI
-                result = extract_skills_from_jd(jd_text, domain)
-                
-                # Get LinkedIn optimized skills
-                linkedin_skills = result.get('linkedin_optimized_skills', result.get('all_skills', [])[:10])
-                
-                # Generate LinkedIn search strings
-                search_strings = generate_linkedin_search_strings(
-                    linkedin_skills,
-                    jd.title,
-                    result.get('experience_level', 'Mid Level')
-                )
-                
-                # Update model with comprehensive data
-                jd.all_skills = ", ".join(result.get('all_skills', []))
-                jd.linkedin_skills_string = ", ".join(linkedin_skills)
-                jd.linkedin_search_string = json.dumps(search_strings)
-                jd.skill_categories = result.get('skill_categories', {})
-                jd.role_category = result.get('role_category', 'Unknown')
-                jd.experience_level = result.get('experience_level', 'Unknown')
-                jd.key_responsibilities = " | ".join(result.get('key_responsibilities', []))
-                jd.qualifications = " | ".join(result.get('qualifications', [])) if isinstance(result.get('qualifications'), list) else result.get('qualifications', '')
-                jd.save()  # This will trigger file deletion via model's save() method
-                
-                # Save to Excel with comprehensive data
-                excel_data = {
-                    'Job Title': jd.title,
-                    'All Skills Required': jd.all_skills,
-                    'LinkedIn Search Skills': jd.linkedin_skills_string,
-                    'LinkedIn Boolean Search': search_strings.get('basic_and', ''),
-                    'Role Category': jd.role_category,
-                    'Experience Level': jd.experience_level,
-                    'Key Responsibilities': jd.key_responsibilities,
-                    'Qualifications': jd.qualifications,
-                    'Date Uploaded': datetime.now().strftime('%Y-%m-%d'),
-                    'Uploaded By': request.user.username
-                }
-                save_jd_to_excel(excel_data)
-                
-                logger.info(f"JD {jd.id} successfully analyzed by user {request.user.id}")
-                messages.success(request, "Job Description analyzed successfully! Original file deleted for security.")
-                return redirect('results', pk=jd.pk)
-                
-            except Exception as e:
-                logger.error(f"Error processing JD upload by user {request.user.id}: {str(e)}")
+            # Analyze within the request: serverless functions don't keep
+            # running background work once the response has been sent.
+            # The PENDING row lets a repeat upload find this one meanwhile.
+            if not analyze_jd(jd.pk, domain, request.user.username):
                 messages.error(request, "An error occurred while processing the file. Please try again.")
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                jd.delete()
                 return redirect('upload_jd')
+            
+            logger.info(f"JD {jd.id} successfully analyzed for user {request.user.id}")
+            messages.success(request, "Job Description analyzed successfully! Original file deleted for security.")
+            return redirect('results', pk=jd.pk)
     else:
         form = JDUploadForm()
     
-    # Show only user's JDs (staff can see all)
-    if request.user.is_staff:
-        recent_jds = JobDescription.objects.all()[:10]
-    else:
-        recent_jds = JobDescription.objects.filter(created_by=request.user)[:10]
+    # Show only user's JDs (staff can see all), leaving out failed uploads.
+    # The list only shows titles, so fetch plain rows of pk and title rather
+    # than model instances.
+    recent_jds = list(
+        user_scoped(JobDescription.objects.exclude(analysis_status='FAILED'), request.user).values('pk', 'title')[:10]
+    )
     
     return render(request, 'base/upload.html', {'form': form, 'recent_jds': recent_jds})
 
+def visible_google_sheets(user):
+    """Active Google Sheets the user can match against (own or shared; staff see all)"""
+    sheets = GoogleSheetDatabase.objects.filter(is_active=True)
+    if not user.is_staff:
+        sheets = sheets.filter(Q(created_by=user) | Q(is_shared=True))
+    return sheets
+
+def page_etag(request, *versions):
+    """
+    ETag of a per-user page rendered from data at the given versions, so the
+    browser can revalidate it with a 304 instead of a full render.
+    None (always render) while flash messages are waiting to be shown.
+    """
+    if messages.get_messages(request):
+        return None
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    key = "|".join(str(part) for part in (request.user.pk, request.user.is_staff, csrf_cookie, *versions))
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+def results_etag(request, pk):
+    jd_version = user_scoped(JobDescription.objects.filter(pk=pk), request.user).values_list('updated_at', 'analysis_status').first()
+    if jd_version is None:
+        return None
+    sheets_version = visible_google_sheets(request.user).aggregate(Max('updated_at'), Count('pk'))
+    return page_etag(request, *jd_version, *sheets_version.values())
+
+def manage_google_sheets_etag(request):
+    sheets = user_scoped(GoogleSheetDatabase.objects.all(), request.user)
+    return page_etag(request, *sheets.aggregate(Max('updated_at'), Count('pk')).values())
+
 @login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=results_etag)
 def results(request, pk):
     """View job description results - requires authentication and ownership"""
-    jd = get_object_or_404(JobDescription, pk=pk)
-    
-    # Check permission
-    if not check_object_permission(request, jd):
-        logger.warning(f"Unauthorized access attempt to JD {pk} by user {request.user.id}")
-        raise PermissionDenied("You don't have permission to view this job description.")
+    # The extracted text isn't shown, so leave the largest column out of the query
+    jd = get_owned_object_or_404(request, JobDescription.objects.defer('jd_text'), pk=pk)
     
-    # Parse LinkedIn search strings
-    linkedin_searches = {}
-    if jd.linkedin_search_string:
-        try:
-            linkedin_searches = json.loads(jd.linkedin_search_string)
-        except json.JSONDecodeError:
-            linkedin_searches = {}
-            logger.error(f"Failed to parse LinkedIn search strings for JD {pk}")
+    if jd.analysis_status != 'DONE':
+        # Fail an analysis whose request was cut off, so its page stops waiting for it
+        if fail_stale_analyses(JobDescription.objects.filter(pk=jd.pk)):
+            jd.refresh_from_db(fields=['analysis_status'])
+        return render(request, 'base/analysis_pending.html', {'jd': jd})
     
-    # Get available Google Sheet databases (user's own or shared)
-    if request.user.is_staff:
-        google_sheets = GoogleSheetDatabase.objects.filter(is_active=True)
-    else:
-        google_sheets = GoogleSheetDatabase.objects.filter(
-            Q(created_by=request.user) | Q(is_shared=True),
-            is_active=True
-        )
+    # Get available Google Sheet databases (user's own or shared). They're
+    # only listed as choices, so load just what their labels (__str__) show.
+    google_sheets = visible_google_sheets(request.user).select_related('created_by').only('name', 'created_by__username')
     
     match_form = CandidateMatchForm()
     match_form.fields['google_sheet'].queryset = google_sheets
@@ -188,7 +202,7 @@ def results(request, pk):
         'jd': jd,
         'all_skills': jd.get_all_skills_list(),
         'linkedin_skills': jd.get_linkedin_skills_list(),
-        'linkedin_searches': linkedin_searches,
+        'linkedin_searches': jd.linkedin_search_string,
         'skill_categories': jd.skill_categories,
         'responsibilities': jd.get_responsibilities_list(),
         'qualifications': jd.get_qualifications_list(),
@@ -220,10 +234,10 @@ def add_google_sheet(request):
             
             # Try to fetch data to validate access
             try:
-                df = fetch_google_sheet_data(sheet_id)
-                sheet_db.total_candidates = len(df)
+                sheet_db.total_candidates = count_google_sheet_candidates(sheet_id)
                 sheet_db.last_synced = timezone.now()
                 sheet_db.save()
+                audit(request, 'SHEET_ADD', sheet_db, {'total_candidates': sheet_db.total_candidates})
                 
                 logger.info(f"Google Sheet {sheet_db.id} added successfully by user {request.user.id}")
                 messages.success(request, f"Google Sheet added successfully! {sheet_db.total_candidates} candidates found.")
@@ -241,13 +255,17 @@ def add_google_sheet(request):
 
 @login_required
 @require_http_methods(["GET"])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=manage_google_sheets_etag)
 def manage_google_sheets(request):
     """View and manage Google Sheet databases - requires authentication"""
-    # Show only user's sheets (staff can see all)
-    if request.user.is_staff:
-        sheets = GoogleSheetDatabase.objects.all()
-    else:
-        sheets = GoogleSheetDatabase.objects.filter(created_by=request.user)
+    # Show only user's sheets (staff can see all), loading just the listed columns
+    sheets = user_scoped(
+        GoogleSheetDatabase.objects.only(
+            'name', 'sheet_url', 'total_candidates', 'last_synced', 'is_active'
+        ),
+        request.user
+    )
     
     return render(request, 'base/manage_google_sheets.html', {'sheets': sheets})
 
@@ -256,21 +274,18 @@ def manage_google_sheets(request):
 @csrf_protect
 def sync_google_sheet(request, sheet_pk):
     """Sync/refresh candidate count from Google Sheet - requires authentication and ownership"""
-    sheet_db = get_object_or_404(GoogleSheetDatabase, pk=sheet_pk)
-    
-    # Check permission
-    if not check_object_permission(request, sheet_db):
-        logger.warning(f"Unauthorized sync attempt for sheet {sheet_pk} by user {request.user.id}")
-        raise PermissionDenied("You don't have permission to sync this sheet.")
+    sheet_db = get_owned_object_or_404(request, GoogleSheetDatabase.objects.only('created_by', 'sheet_id'), pk=sheet_pk)
     
     try:
-        df = fetch_google_sheet_data(sheet_db.sheet_id)
-        sheet_db.total_candidates = len(df)
-        sheet_db.last_synced = timezone.now()
-        sheet_db.save()
+        total_candidates = count_google_sheet_candidates(sheet_db.sheet_id)
+        now = timezone.now()
+        GoogleSheetDatabase.objects.filter(pk=sheet_pk).update(
+            total_candidates=total_candidates, last_synced=now, updated_at=now
+        )
+        audit(request, 'SHEET_SYNC', details={'sheet_id': sheet_pk, 'total_candidates': total_candidates})
         
         logger.info(f"Sheet {sheet_pk} synced successfully by user {request.user.id}")
-        messages.success(request, f"Synced successfully! {sheet_db.total_candidates} candidates found.")
+        messages.success(request, f"Synced successfully! {total_candidates} candidates found.")
     except Exception as e:
         logger.error(f"Sync failed for sheet {sheet_pk} by user {request.user.id}: {str(e)}")
         messages.error(request, f"Sync failed: {str(e)}")
@@ -282,24 +297,24 @@ def sync_google_sheet(request, sheet_pk):
 @csrf_protect
 def match_candidates(request, jd_pk):
     """Match candidates from Google Sheet with JD requirements - requires authentication and ownership"""
-    jd = get_object_or_404(JobDescription, pk=jd_pk)
+    jd = get_owned_object_or_404(
+        request,
+        JobDescription.objects.only('title', 'all_skills', 'all_skills_json', 'analysis_status', 'created_by'),
+        pk=jd_pk
+    )
     
-    # Check permission
-    if not check_object_permission(request, jd):
-        logger.warning(f"Unauthorized match attempt for JD {jd_pk} by user {request.user.id}")
-        raise PermissionDenied("You don't have permission to match candidates for this job description.")
+    if jd.analysis_status != 'DONE':
+        messages.error(request, "This job description hasn't been analyzed yet.")
+        return redirect('results', pk=jd.pk)
     
+    # Only sheets the user owns or that are shared are valid choices
     form = CandidateMatchForm(request.POST)
+    form.fields['google_sheet'].queryset = visible_google_sheets(request.user)
     
     if form.is_valid():
         google_sheet = form.cleaned_data['google_sheet']
         min_match = form.cleaned_data['min_match_percentage']
         
-        # Check permission for Google Sheet
-        if not check_object_permission(request, google_sheet) and not google_sheet.is_shared:
-            logger.warning(f"Unauthorized access to sheet {google_sheet.id} by user {request.user.id}")
-            raise PermissionDenied("You don't have permission to use this Google Sheet.")
-        
         try:
             # Get required skills from JD
             required_skills = jd.get_all_skills_list()
@@ -310,42 +325,40 @@ def match_candidates(request, jd_pk):
                 required_skills,
                 min_match
             )
+            audit(request, 'MATCH_RUN', jd, {
+                'sheet_id': google_sheet.pk,
+                'min_match_percentage': min_match,
+                'matches': len(matched_candidates),
+            })
             
-            if matched_candidates:
-                # Export to Excel (will be deleted after download)
-                output_filename = f"matched_candidates_{jd.title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-                output_path = Path(settings.MEDIA_ROOT) / 'matched_candidates' / output_filename
-                output_path.parent.mkdir(parents=True, exist_ok=True)
+            if not matched_candidates.empty:
+                # Most matches are viewed but never downloaded, so only the shown
+                # candidates are kept; a download runs the match again from the
+                # parameters in the session and writes the Excel report then
+                output_filename = f"matched_candidates_{slugify(jd.title) or 'jd'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
                 
-                export_matched_candidates(matched_candidates, output_path)
+                # Store the top candidates for display (limit to essential data)
+                top_candidates = matched_candidates.head(MAX_SESSION_CANDIDATES)
+                session_candidates = top_candidates[SESSION_CANDIDATE_FIELDS].assign(
+                    matched_skills=top_candidates['matched_skills'].str[:MAX_SESSION_MATCHED_SKILLS]
+                ).to_dict('records')
                 
-                # Store in session for display (limit to essential data)
-                session_candidates = []
-                for candidate in matched_candidates[:MAX_SESSION_CANDIDATES]:
-                    session_candidates.append({
-                        'name': candidate['name'],
-                        'email': candidate['email'],
-                        'contact': candidate['contact'],
-                        'designation': candidate['designation'],
-                        'current_company': candidate['current_company'],
-                        'experience': candidate['experience'],
-                        'location': candidate['location'],
-                        'linkedin': candidate['linkedin'],
-                        'match_percentage': candidate['match_percentage'],
-                        'matched_skills_count': candidate['matched_skills_count'],
-                        'total_required_skills': candidate['total_required_skills'],
-                        'matched_skills': candidate['matched_skills'][:10],
-                        'cv_link': candidate['cv_link'],
-                    })
-                
-                request.session['matched_candidates'] = session_candidates
-                request.session['output_file'] = str(output_path.relative_to(settings.MEDIA_ROOT))
+                # Keep the candidate list out of the session; it only holds the key
+                match_id = uuid.uuid4().hex
+                caches['matches'].set(f"match:{match_id}", session_candidates)
+                request.session['match_id'] = match_id
+                request.session['match_params'] = {'sheet_pk': google_sheet.pk, 'min_match_percentage': min_match}
+                request.session['output_filename'] = output_filename
                 request.session['sheet_name'] = google_sheet.name
                 request.session['total_matches'] = len(matched_candidates)
                 request.session['jd_id'] = jd.pk  # Store JD ID for verification
                 
-                # Cleanup old matched files (older than 1 day)
-                cleanup_old_matched_files(days=1)
+                # Cleanup old matched files (older than 1 day), at most once per
+                # interval across all instances, gated in the shared 'matches' cache;
+                # `manage.py cleanup_matched_files` can run it from cron. Reports are
+                # deleted as soon as they're streamed, so this only catches leftovers.
+                if caches['matches'].add('matched_files_cleanup', True, MATCHED_FILES_CLEANUP_INTERVAL):
+                    cleanup_old_matched_files(days=1)
                 
                 logger.info(f"Found {len(matched_candidates)} matches for JD {jd_pk} by user {request.user.id}")
                 messages.success(request, f"Found {len(matched_candidates)} matching candidates from {google_sheet.name}!")
@@ -365,12 +378,7 @@ def match_candidates(request, jd_pk):
 @require_http_methods(["GET"])
 def show_matches(request, jd_pk):
     """Display matched candidates - requires authentication and ownership"""
-    jd = get_object_or_404(JobDescription, pk=jd_pk)
-    
-    # Check permission
-    if not check_object_permission(request, jd):
-        logger.warning(f"Unauthorized access to matches for JD {jd_pk} by user {request.user.id}")
-        raise PermissionDenied("You don't have permission to view these matches.")
+    jd = get_owned_object_or_404(request, JobDescription.objects.only('title', 'created_by'), pk=jd_pk)
     
     # Verify session data belongs to this JD
     session_jd_id = request.session.get('jd_id')
@@ -379,8 +387,12 @@ def show_matches(request, jd_pk):
         messages.error(request, "Invalid session data. Please run the match again.")
         return redirect('results', pk=jd_pk)
     
-    matched_candidates = request.session.get('matched_candidates', [])
-    output_file = request.session.get('output_file', '')
+    matched_candidates = caches['matches'].get(f"match:{request.session.get('match_id')}")
+    if matched_candidates is None:
+        messages.error(request, "These match results have expired. Please run the match again.")
+        return redirect('results', pk=jd_pk)
+    
+    output_file = request.session.get('output_filename', '')
     sheet_name = request.session.get('sheet_name', 'Google Sheet')
     total_matches = request.session.get('total_matches', len(matched_candidates))
     
@@ -398,12 +410,9 @@ def show_matches(request, jd_pk):
 @require_http_methods(["GET"])
 def download_matched_file(request, jd_pk):
     """Download matched candidates file - requires authentication and ownership"""
-    jd = get_object_or_404(JobDescription, pk=jd_pk)
-    
-    # Check permission
-    if not check_object_permission(request, jd):
-        logger.warning(f"Unauthorized download attempt for JD {jd_pk} by user {request.user.id}")
-        raise PermissionDenied("You don't have permission to download this file.")
+    jd = get_owned_object_or_404(
+        request, JobDescription.objects.only('title', 'all_skills', 'all_skills_json', 'created_by'), pk=jd_pk
+    )
     
     # Verify session data belongs to this JD
     session_jd_id = request.session.get('jd_id')
@@ -411,49 +420,58 @@ def download_matched_file(request, jd_pk):
         logger.warning(f"Session JD mismatch for download by user {request.user.id}")
         raise Http404("File not found or session expired")
     
-    output_file = request.session.get('output_file', '')
+    # Run the match again from its parameters, against a sheet the user may still use
+    match_id = request.session.get('match_id')
+    match_params = request.session.get('match_params')
+    google_sheet = None
+    if match_params:
+        google_sheet = visible_google_sheets(request.user).filter(pk=match_params['sheet_pk']).only('sheet_id').first()
+    if google_sheet is None:
+        raise Http404("File not found or session expired")
     
-    if not output_file:
-        raise Http404("File not found")
+    matched_candidates = match_candidates_from_google_sheet(
+        google_sheet.sheet_id, jd.get_all_skills_list(), match_params['min_match_percentage']
+    )
+    if matched_candidates.empty:
+        messages.error(request, "No candidates match anymore. The sheet may have changed; please run the match again.")
+        return redirect('show_matches', jd_pk=jd_pk)
     
-    file_path = Path(settings.MEDIA_ROOT) / output_file
+    # Write the report to a uniquely named file; it's deleted once streamed
+    output_dir = Path(settings.MEDIA_ROOT) / 'matched_candidates'
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=output_dir, suffix='.xlsx', delete=False) as output:
+        file_path = Path(output.name)
     
-    # Validate file path to prevent directory traversal
-    try:
-        file_path = file_path.resolve()
-        media_root = Path(settings.MEDIA_ROOT).resolve()
-        if not str(file_path).startswith(str(media_root)):
-            logger.error(f"Directory traversal attempt by user {request.user.id}: {file_path}")
-            raise PermissionDenied("Invalid file path")
-    except Exception as e:
-        logger.error(f"File path validation error: {str(e)}")
-        raise Http404("Invalid file path")
-    
-    if not file_path.exists():
-        logger.warning(f"File not found for download: {file_path}")
-        raise Http404("File not found")
+    if not export_matched_candidates(matched_candidates, file_path):
+        file_path.unlink(missing_ok=True)
+        messages.error(request, "Could not create the Excel report. Please try again.")
+        return redirect('show_matches', jd_pk=jd_pk)
     
     try:
-        # Read file into memory
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
-        
-        # Delete immediately
-        os.remove(file_path)
-        
-        # Serve from memory
-        from io import BytesIO
+        # Stream the file from disk instead of reading it into memory
+        file_handle = open(file_path, 'rb')
         response = FileResponse(
-            BytesIO(file_data),
+            file_handle,
+            as_attachment=True,
+            filename=request.session.get('output_filename') or 'matched_candidates.xlsx',
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        response['Content-Disposition'] = f'attachment; filename="{file_path.name}"'
+        
+        # Delete immediately; the open handle keeps streaming the contents.
+        # Platforms that can't unlink an open file delete it once the download is done.
+        try:
+            os.remove(file_path)
+        except OSError:
+            delete_file_after_delay(str(file_path), delay_seconds=60)
         
         # Clear session
-        request.session.pop('matched_candidates', None)
-        request.session.pop('output_file', None)
+        request.session.pop('match_id', None)
+        request.session.pop('match_params', None)
+        caches['matches'].delete(f"match:{match_id}")
+        request.session.pop('output_filename', None)
         request.session.pop('jd_id', None)
         
+        audit(request, 'FILE_DOWNLOAD', jd, {'filename': response.filename})
         logger.info(f"File downloaded successfully by user {request.user.id} for JD {jd_pk}")
         return response
     